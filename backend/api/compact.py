@@ -0,0 +1,91 @@
+import re
+
+# Fields a compact route_data can carry; `steps` is only sent when asked for
+COMPACT_FIELDS = (
+    "polyline",
+    "bounds",
+    "distance_m",
+    "duration_s",
+    "distance_text",
+    "duration_text",
+    "start_location",
+    "end_location",
+    "pois",
+    "crowd",
+    "safety",
+    "static_map_url",
+    "steps",
+)
+
+DEFAULT_COMPACT_FIELDS = (
+    "polyline",
+    "bounds",
+    "distance_m",
+    "duration_s",
+    "distance_text",
+    "duration_text",
+    "pois",
+    "static_map_url",
+)
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def _compact_pois(enrichment):
+    return {
+        q: [
+            {
+                "name": p.get("name"),
+                "lat": p.get("lat"),
+                "lng": p.get("lng"),
+                "rating": p.get("rating"),
+                "distance_m": p.get("distance_m"),
+            }
+            for p in places
+        ]
+        for q, places in (enrichment or {}).items()
+    }
+
+
+def _compact_steps(leg):
+    return [
+        {
+            "instruction": _TAGS.sub("", step.get("html_instructions", "")),
+            "distance_m": step.get("distance", {}).get("value"),
+            "distance_text": step.get("distance", {}).get("text"),
+            "duration_s": step.get("duration", {}).get("value"),
+            "polyline": step.get("polyline", {}).get("points"),
+        }
+        for step in leg.get("steps", [])
+    ]
+
+
+def compact_route_data(route, fields=None, include_steps=False):
+    """
+    Small route_data for clients that draw from the encoded polyline.
+    Only the requested `fields` are built; steps are dropped unless
+    `include_steps` is set (or "steps" is listed explicitly).
+    """
+    wanted = set(fields or DEFAULT_COMPACT_FIELDS)
+    if include_steps:
+        wanted.add("steps")
+
+    leg = route.get("legs", [{}])[0]
+
+    builders = {
+        "polyline": lambda: route.get("overview_polyline", {}).get("points"),
+        "bounds": lambda: route.get("bounds"),
+        "distance_m": lambda: leg.get("distance", {}).get("value"),
+        "duration_s": lambda: leg.get("duration", {}).get("value"),
+        "distance_text": lambda: leg.get("distance", {}).get("text"),
+        "duration_text": lambda: leg.get("duration", {}).get("text"),
+        "start_location": lambda: leg.get("start_location"),
+        "end_location": lambda: leg.get("end_location"),
+        "pois": lambda: _compact_pois(route.get("enrichment")),
+        "crowd": lambda: route.get("crowd"),
+        "safety": lambda: route.get("safety"),
+        "static_map_url": lambda: route.get("static_map_url"),
+        "steps": lambda: _compact_steps(leg),
+    }
+
+    return {name: build() for name, build in builders.items() if name in wanted}
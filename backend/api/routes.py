@@ -1,58 +1,171 @@
+import logging
+
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from backend.api.schemas import RouteRequest, RouteResponse, DurationRouteRequest
-from backend.services.agent_service import get_best_route, get_best_route_by_duration
+from backend.api.compact import compact_route_data
+from backend.api.schemas import BatchRouteRequest, RouteRequest, RouteResponse, DurationRouteRequest
+from backend.services.agent_service import (
+    aget_best_route,
+    aget_best_route_by_duration,
+    astream_best_route,
+    astream_best_route_by_duration,
+    astream_best_routes_batch,
+)
+from backend.services.metrics_service import get_logger, log_sampled, render_metrics, timed
 
 router = APIRouter()
+logger = get_logger("api")
+
+
+def _log_result(kind, result):
+    # sampled: one line per request is too much on the hot path
+    log_sampled(
+        logger,
+        logging.DEBUG,
+        "%s result: route_id=%s fallback=%s summary=%r",
+        kind,
+        result["route_id"],
+        result.get("fallback", False),
+        result["summary"],
+    )
+
+
+def _route_data(result, req):
+    if req.response_mode == "compact":
+        return compact_route_data(result["route"], req.fields, req.include_steps)
+    return result["route"]
+
+
+def _route_response(result, req):
+    """The /route response body for a pipeline result."""
+    return {
+        "route_id": result["route_id"],
+        "summary": result["summary"],
+        "explanation": result["explanation"],
+        # full route object unless compact
+        "route_data": _route_data(result, req),
+    }
 
 
 @router.post("/route", response_model=RouteResponse)
-def get_route(req: RouteRequest):
+@timed("request.route")
+async def get_route(req: RouteRequest):
     try:
-        result = get_best_route(
+        result = await aget_best_route(
             origin=req.origin,
             destination=req.destination,
             user_query=req.user_query,
             enrichment_queries=req.enrichment_queries,
+            scoring_mode=req.scoring_mode,
         )
 
-        print("RAW AGENT RESULT:")
-        print(result)
+        _log_result("route", result)
 
-        return RouteResponse(
-            route_id=result["route_id"],
-            summary=result["summary"],
-            explanation=result["explanation"],
-            route_data=result["route"],   # full route object
-        )
+        return RouteResponse(**_route_response(result, req))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/route/by-duration", response_model=RouteResponse)
-def get_route_by_duration(req: DurationRouteRequest):
+@timed("request.by_duration")
+async def get_route_by_duration(req: DurationRouteRequest):
     try:
-        result = get_best_route_by_duration(
+        result = await aget_best_route_by_duration(
             origin=req.origin,
             minutes=req.minutes,
             user_query=req.user_query,
             enrichment_queries=req.enrichment_queries,
+            scoring_mode=req.scoring_mode,
         )
 
-        print("RAW DURATION AGENT RESULT:")
-        print(result)
+        _log_result("by-duration", result)
 
-        return RouteResponse(
-            route_id=result["route_id"],
-            summary=result["summary"],
-            explanation=result["explanation"],
-            route_data=result["route"],
-        )
+        return RouteResponse(**_route_response(result, req))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _sse(events):
+    """Encode (event, data) pairs as server-sent events."""
+    async for event, data in events:
+        yield f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
+
+async def _shaped(events, req, kind):
+    """Pass pipeline events through, giving `result` the /route response shape."""
+    async for event, data in events:
+        if event == "result":
+            _log_result(kind, data)
+            data = _route_response(data, req)
+        yield event, data
+
+
+def _event_stream(events):
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        # stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/route/stream")
+async def stream_route(req: RouteRequest):
+    events = astream_best_route(
+        origin=req.origin,
+        destination=req.destination,
+        user_query=req.user_query,
+        enrichment_queries=req.enrichment_queries,
+        scoring_mode=req.scoring_mode,
+    )
+    return _event_stream(_shaped(events, req, "stream"))
+
+
+@router.post("/route/by-duration/stream")
+async def stream_route_by_duration(req: DurationRouteRequest):
+    events = astream_best_route_by_duration(
+        origin=req.origin,
+        minutes=req.minutes,
+        user_query=req.user_query,
+        enrichment_queries=req.enrichment_queries,
+        scoring_mode=req.scoring_mode,
+    )
+    return _event_stream(_shaped(events, req, "by-duration stream"))
+
+
+# request fields the pipeline needs (the rest only shape the response)
+_PIPELINE_FIELDS = {"origin", "destination", "minutes", "user_query", "enrichment_queries", "scoring_mode"}
+
+
+@router.post("/routes/batch")
+async def route_batch(req: BatchRouteRequest):
+    """
+    Best route for every item, streamed as one `item` event (index plus the
+    /route response) per item in completion order, or `item_error`.
+    """
+    async def events():
+        items = [item.model_dump(include=_PIPELINE_FIELDS) for item in req.items]
+        async for idx, result in astream_best_routes_batch(items):
+            if isinstance(result, Exception):
+                yield "item_error", {"index": idx, "detail": str(result)}
+                continue
+
+            _log_result("batch", result)
+            yield "item", {"index": idx, **_route_response(result, req.items[idx])}
+
+    return _event_stream(events())
+
+
 @router.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Stage latencies and call counts in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,15 @@
+import os
+
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional, Union
+
+from backend.api.compact import COMPACT_FIELDS
+
+ScoringMode = Literal["llm", "local", "hybrid"]
+ResponseMode = Literal["full", "compact"]
+CompactField = Literal[COMPACT_FIELDS]
+
+BATCH_MAX_ITEMS = int(os.getenv("LOOPWALK_BATCH_MAX_ITEMS", "100"))
 
 
 class RouteRequest(BaseModel):
@@ -10,6 +20,12 @@ class RouteRequest(BaseModel):
         default_factory=lambda: ["cafe"],
         example=["cafe", "park"]
     )
+    # overrides LOOPWALK_SCORING_MODE for this request
+    scoring_mode: Optional[ScoringMode] = Field(default=None, example="local")
+    # "compact" returns only the selected route_data fields (see backend/api/compact.py)
+    response_mode: ResponseMode = Field(default="full", example="compact")
+    fields: Optional[List[CompactField]] = Field(default=None, example=["polyline", "bounds", "pois"])
+    include_steps: bool = False
 
 class DurationRouteRequest(BaseModel):
     origin: str = Field(..., example="Millennium Park, Chicago")
@@ -19,6 +35,19 @@ class DurationRouteRequest(BaseModel):
         default_factory=lambda: ["cafe"],
         example=["cafe", "park"]
     )
+    # overrides LOOPWALK_SCORING_MODE for this request
+    scoring_mode: Optional[ScoringMode] = Field(default=None, example="local")
+    # "compact" returns only the selected route_data fields (see backend/api/compact.py)
+    response_mode: ResponseMode = Field(default="full", example="compact")
+    fields: Optional[List[CompactField]] = Field(default=None, example=["polyline", "bounds", "pois"])
+    include_steps: bool = False
+
+
+class BatchRouteRequest(BaseModel):
+    # destination-based and duration-based items may be mixed
+    items: List[Union[RouteRequest, DurationRouteRequest]] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS
+    )
 
 
 class RouteResponse(BaseModel):
@@ -1,9 +1,29 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from backend.api.routes import router as api_router
+from backend.services.maps_service import close_async_client
+from backend.services.metrics_service import get_logger
+from loopwalk_ai.runner import warm_up
+
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = get_logger("main")
+
 
-app = FastAPI(title="LoopWalk API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # compile the agent graph + LLM wrappers before the first request
+    timings = warm_up()
+    logger.info("Agent warm-up done: %s", timings)
+    yield
+    await close_async_client()
+
+
+app = FastAPI(title="LoopWalk API", lifespan=lifespan)
 
 # allow frontend to call API
 app.add_middleware(
@@ -14,4 +34,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# compress JSON responses (event streams are left alone by the middleware)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 app.include_router(api_router)
\ No newline at end of file
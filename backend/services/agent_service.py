@@ -1,108 +1,780 @@
-from loopwalk_ai.runner import run_agent, run_agent_by_duration
+import asyncio
+import copy
+import functools
+import inspect
+import os
+import threading
+import weakref
+from concurrent.futures import Future
+
+from loopwalk_ai.batch import aprefill_intents, aprefill_scores
+from loopwalk_ai.config import SCORING_MODE
+from loopwalk_ai.intent_cache import alookup_intent
+from loopwalk_ai.scoring import score_candidates
+from loopwalk_ai.runner import (
+    arun_agent,
+    arun_agent_by_duration,
+    get_graph,
+    initial_state,
+    run_agent,
+    run_agent_by_duration,
+    warm_up,
+)
 from backend.services.maps_service import (
+    _gather_bounded,
+    aenrich_full,
+    aenrich_routes,
+    ageocode_address,
+    aget_many_routes,
+    aget_routes_by_duration,
+    aprefetch_places,
     build_static_map_url,
     get_many_routes,
     get_routes_by_duration,
 )
+from backend.services.cache_service import TTLCache, normalize_key
+from backend.services.metrics_service import RESULT_CACHE_REQUESTS, get_logger
+
+logger = get_logger("agent")
+
+# Finished results for identical requests are reused for a few minutes.
+RESULT_CACHE_TTL_S = float(os.getenv("LOOPWALK_RESULT_CACHE_TTL_S", "300"))
+RESULT_CACHE_SIZE = int(os.getenv("LOOPWALK_RESULT_CACHE_SIZE", "512"))
+
+# Items of one batch call that run their graph concurrently
+BATCH_CONCURRENCY = int(os.getenv("LOOPWALK_BATCH_CONCURRENCY", "8"))
+
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+# in-flight async runs, per event loop: a Task must only be awaited on the
+# loop that runs it
+_ainflight = weakref.WeakKeyDictionary()
+
+
+def _count(outcome):
+    RESULT_CACHE_REQUESTS.inc(outcome=outcome)
+
+
+def _request_key(kind, arguments):
+    """Cache key for a request: normalized text args, sorted enrichment queries."""
+    parts = [kind]
+
+    for name, value in arguments.items():
+        if name == "scoring_mode":
+            value = value or SCORING_MODE
+        if isinstance(value, (list, tuple)):
+            value = ",".join(sorted(normalize_key(str(v)) for v in value))
+        parts.append(normalize_key(str(value)))
+
+    return "|".join(parts)
+
+
+def _cacheable(result):
+    # degraded fallback answers are not worth pinning for the whole TTL
+    return not result.get("fallback")
+
+
+# Every caller gets its own copy of a result: the cached one (and the one
+# coalesced callers share) must not change when a caller annotates its own.
+def _cached_call(key, compute):
+    cached = result_cache.get(key)
+    if cached is not None:
+        _count("hit")
+        return copy.deepcopy(cached)
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not leader:
+        _count("coalesced")
+        return copy.deepcopy(future.result())
+
+    _count("miss")
+    try:
+        result = compute()
+        if _cacheable(result):
+            result_cache.set(key, result)
+        future.set_result(result)
+        return copy.deepcopy(result)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+async def _acached_call(key, compute):
+    cached = result_cache.get(key)
+    if cached is not None:
+        _count("hit")
+        return copy.deepcopy(cached)
+
+    inflight = _ainflight.setdefault(asyncio.get_running_loop(), {})
+    task = inflight.get(key)
+    if task is not None:
+        _count("coalesced")
+        # shield: one caller going away must not cancel the shared run
+        return copy.deepcopy(await asyncio.shield(task))
+
+    _count("miss")
 
+    async def run():
+        result = await compute()
+        if _cacheable(result):
+            result_cache.set(key, result)
+        return result
 
-def _fallback_from_maps(origin: str, destination: str | None = None, minutes: int | None = None):
+    task = asyncio.ensure_future(run())
+    inflight[key] = task
+    task.add_done_callback(lambda _: inflight.pop(key, None))
+
+    return copy.deepcopy(await asyncio.shield(task))
+
+
+def _single_flight(kind):
+    """
+    Serve a get_best_route* function from result_cache, and let concurrent
+    identical calls share one pipeline run. Works for sync and async functions.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return _request_key(kind, bound.arguments)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await _acached_call(key_for(args, kwargs), lambda: fn(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return _cached_call(key_for(args, kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def _fallback_from_maps(
+    origin: str,
+    destination: str | None = None,
+    minutes: int | None = None,
+    partial: dict | None = None,
+):
     """
     Fallback route selection when AI scoring fails.
-    Returns the first available Google Directions candidate route.
+    Ranks the candidates the failed run already fetched when there are any;
+    only asks Google for routes again when the run got no candidates, reusing
+    the points it geocoded.
     """
+    reused = _fallback_from_partial(partial)
+    if reused is not None:
+        return reused
+
+    # same request as the failed run, minus the geocoding it already did
+    locations = (partial or {}).get("locations")
+    routes = (
+        get_many_routes(origin, destination, num_variations=3, locations=locations)
+        if destination
+        else get_routes_by_duration(origin, minutes or 20, locations=locations)
+    )
+
+    return _fallback_result(routes)
+
+
+async def _afallback_from_maps(
+    origin: str,
+    destination: str | None = None,
+    minutes: int | None = None,
+    partial: dict | None = None,
+):
+    """Async _fallback_from_maps."""
+    reused = _fallback_from_partial(partial)
+    if reused is not None:
+        return reused
+
+    locations = (partial or {}).get("locations")
     routes = (
-        get_many_routes(origin, destination)
+        await aget_many_routes(origin, destination, num_variations=3, locations=locations)
         if destination
-        else get_routes_by_duration(origin, minutes or 20)
+        else await aget_routes_by_duration(origin, minutes or 20, locations=locations)
+    )
+
+    return _fallback_result(routes)
+
+
+def _fallback_from_partial(partial):
+    """
+    Pick a route from what a failed run left in `partial` (see run_agent),
+    without any new upstream calls. Prefers, in order: the route the graph
+    already chose, the best score it produced, a local score of the
+    enriched candidates, and finally the first fetched route.
+    """
+    partial = partial or {}
+    routes = partial.get("enriched_routes") or partial.get("routes")
+    if not routes:
+        return None
+
+    state = partial.get("state") or {}
+    if not partial.get("enriched_routes") or not state.get("routes"):
+        return _fallback_result(routes)
+
+    chosen_id = state.get("chosen_route_id")
+    # an id the LLM made up (or a negative one) must not index the routes
+    if chosen_id is None or not 0 <= chosen_id < len(routes):
+        scores = state.get("route_scores") or score_candidates(
+            state["routes"], state.get("preferences")
+        )
+        scores = [s for s in scores if 0 <= s["route_id"] < len(routes)]
+        if not scores:
+            return _fallback_result(routes)
+        chosen_id = max(scores, key=lambda s: s["score"])["route_id"]
+
+    return _fallback_result(
+        routes,
+        chosen_id,
+        "AI scoring was unavailable, so LoopWalk ranked the candidate routes it had "
+        "already found by your preferences.",
     )
 
+
+def _fallback_result(routes, route_id=0, explanation=None):
     if not routes:
         raise Exception("No routes available from Google Maps for the provided input.")
 
-    first_route = routes[0]
-    first_route["static_map_url"] = build_static_map_url(first_route)
+    route = routes[route_id]
+    route["static_map_url"] = build_static_map_url(route)
 
-    leg = first_route.get("legs", [{}])[0]
+    leg = route.get("legs", [{}])[0]
     distance = leg.get("distance", {}).get("text", "unknown distance")
     duration = leg.get("duration", {}).get("text", "unknown duration")
 
     return {
-        "route_id": 0,
-        "summary": first_route.get("summary", f"Fallback route ({distance}, {duration})"),
-        "route": first_route,
-        "explanation": (
+        "fallback": True,
+        "route_id": route_id,
+        "summary": route.get("summary", f"Fallback route ({distance}, {duration})"),
+        "route": route,
+        "explanation": explanation or (
             "AI scoring was unavailable, so LoopWalk returned a valid Google Maps walking route "
             "to keep navigation working."
         ),
     }
 
 
+@_single_flight("route")
 def get_best_route(
     origin: str,
     destination: str,
     user_query: str,
     enrichment_queries: list[str],
+    scoring_mode: str | None = None,
 ):
     """
     Backend wrapper around agent pipeline.
     Falls back to plain Google route selection if AI pipeline fails.
     """
+    partial = {}
     try:
         agent_state, enriched_routes = run_agent(
             origin,
             destination,
             user_query,
             enrichment_queries,
+            scoring_mode=scoring_mode,
+            partial=partial,
         )
 
-        chosen_id = agent_state["chosen_route_id"]
-        chosen_route = enriched_routes[chosen_id]
-        chosen_route["static_map_url"] = build_static_map_url(chosen_route)
-
-        return {
-            "route_id": chosen_id,
-            "summary": chosen_route.get("summary", f"Route {chosen_id}"),
-            "route": chosen_route,
-            "explanation": agent_state.get(
-                "explanation", "Route selected by AI scoring pipeline."
-            ),
-        }
+        return _agent_result(agent_state, enriched_routes)
     except Exception as e:
-        print(f"AI pipeline failed for get_best_route, using fallback: {e}")
-        fallback = _fallback_from_maps(origin=origin, destination=destination)
+        logger.warning("AI pipeline failed for get_best_route, using fallback: %s", e)
+        fallback = _fallback_from_maps(origin=origin, destination=destination, partial=partial)
         fallback["explanation"] += f" (fallback reason: {e})"
         return fallback
 
 
+@_single_flight("duration")
 def get_best_route_by_duration(
     origin: str,
     minutes: int,
     user_query: str,
     enrichment_queries: list[str],
+    scoring_mode: str | None = None,
 ):
+    partial = {}
     try:
         agent_state, enriched_routes = run_agent_by_duration(
             origin,
             minutes,
             user_query,
             enrichment_queries,
+            scoring_mode=scoring_mode,
+            partial=partial,
         )
 
-        chosen_id = agent_state["chosen_route_id"]
-        chosen_route = enriched_routes[chosen_id]
-        chosen_route["static_map_url"] = build_static_map_url(chosen_route)
-
-        return {
-            "route_id": chosen_id,
-            "summary": chosen_route.get("summary", f"Route {chosen_id}"),
-            "route": chosen_route,
-            "explanation": agent_state.get(
-                "explanation", "Route selected by AI scoring pipeline."
-            ),
+        return _agent_result(agent_state, enriched_routes)
+    except Exception as e:
+        logger.warning("AI pipeline failed for get_best_route_by_duration, using fallback: %s", e)
+        fallback = _fallback_from_maps(origin=origin, minutes=minutes, partial=partial)
+        fallback["explanation"] += f" (fallback reason: {e})"
+        return fallback
+
+
+@_single_flight("route")
+async def aget_best_route(
+    origin: str,
+    destination: str,
+    user_query: str,
+    enrichment_queries: list[str],
+    scoring_mode: str | None = None,
+):
+    """Async get_best_route: the whole pipeline awaits I/O instead of blocking a thread."""
+    partial = {}
+    try:
+        agent_state, enriched_routes = await arun_agent(
+            origin,
+            destination,
+            user_query,
+            enrichment_queries,
+            scoring_mode=scoring_mode,
+            partial=partial,
+        )
+
+        return _agent_result(agent_state, enriched_routes)
+    except Exception as e:
+        logger.warning("AI pipeline failed for get_best_route, using fallback: %s", e)
+        fallback = await _afallback_from_maps(origin=origin, destination=destination, partial=partial)
+        fallback["explanation"] += f" (fallback reason: {e})"
+        return fallback
+
+
+@_single_flight("duration")
+async def aget_best_route_by_duration(
+    origin: str,
+    minutes: int,
+    user_query: str,
+    enrichment_queries: list[str],
+    scoring_mode: str | None = None,
+):
+    partial = {}
+    try:
+        agent_state, enriched_routes = await arun_agent_by_duration(
+            origin,
+            minutes,
+            user_query,
+            enrichment_queries,
+            scoring_mode=scoring_mode,
+            partial=partial,
+        )
+
+        return _agent_result(agent_state, enriched_routes)
+    except Exception as e:
+        logger.warning("AI pipeline failed for get_best_route_by_duration, using fallback: %s", e)
+        fallback = await _afallback_from_maps(origin=origin, minutes=minutes, partial=partial)
+        fallback["explanation"] += f" (fallback reason: {e})"
+        return fallback
+
+
+def _agent_result(agent_state, enriched_routes):
+    chosen_id = agent_state["chosen_route_id"]
+    chosen_route = enriched_routes[chosen_id]
+    chosen_route["static_map_url"] = build_static_map_url(chosen_route)
+
+    return {
+        "route_id": chosen_id,
+        "summary": chosen_route.get("summary", f"Route {chosen_id}"),
+        "route": chosen_route,
+        "explanation": agent_state.get(
+            "explanation", "Route selected by AI scoring pipeline."
+        ),
+    }
+
+
+# -------------------------
+# STREAMING
+# -------------------------
+def _route_preview(route, idx):
+    """Just enough of a route for the client to draw it."""
+    leg = route.get("legs", [{}])[0]
+
+    return {
+        "route_id": idx,
+        "summary": route.get("summary", f"Route {idx}"),
+        "overview_polyline": route.get("overview_polyline", {}).get("points"),
+        "bounds": route.get("bounds"),
+        "distance_m": leg.get("distance", {}).get("value"),
+        "duration_s": leg.get("duration", {}).get("value"),
+    }
+
+
+async def _astream_pipeline(
+    fetch_routes, origin, destination_label, user_query, enrichment_queries, scoring_mode, partial
+):
+    """
+    Run the agent pipeline and yield (event, data) pairs as each stage
+    finishes: candidates, enrichment (per route), preferences, scores,
+    chosen, explanation tokens, then the final result.
+    Intermediate results are kept in `partial`, as run_agent does.
+    """
+    routes = await fetch_routes(partial.setdefault("locations", {}))
+    if not routes:
+        raise Exception("No routes available from Google Maps for the provided input.")
+    partial["routes"] = routes
+
+    yield "candidates", [_route_preview(r, idx) for idx, r in enumerate(routes)]
+
+    # one coverage plan for all candidates, then enrich concurrently,
+    # reporting each route as soon as it is done
+    await aprefetch_places(routes, enrichment_queries)
+
+    async def enrich(idx, route):
+        await aenrich_full(route, enrichment_queries)
+        return idx, route
+
+    for done in asyncio.as_completed([enrich(idx, r) for idx, r in enumerate(routes)]):
+        idx, route = await done
+        yield "enrichment", {
+            "route_id": idx,
+            "pois": {q: [p["name"] for p in places] for q, places in route.get("enrichment", {}).items()},
+            "crowd": route.get("crowd"),
+            "safety": route.get("safety"),
         }
+
+    partial["enriched_routes"] = routes
+
+    state = initial_state(origin, destination_label, user_query, routes, enrichment_queries, scoring_mode)
+    warm_up()
+
+    final_state = dict(state)
+    partial["state"] = final_state
+    async for mode, chunk in get_graph().astream(state, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "explain" and message.content:
+                yield "explanation_token", {"text": message.content}
+            continue
+
+        for node, update in chunk.items():
+            if not update:
+                continue
+            final_state.update(update)
+            if node == "intent":
+                yield "preferences", final_state["preferences"]
+            elif node in ("score", "score_local", "tie_break"):
+                yield "scores", final_state["route_scores"]
+            elif node == "select":
+                chosen_id = final_state["chosen_route_id"]
+                yield "chosen", {
+                    "route_id": chosen_id,
+                    "summary": routes[chosen_id].get("summary", f"Route {chosen_id}"),
+                    "static_map_url": build_static_map_url(routes[chosen_id]),
+                }
+
+    yield "result", _agent_result(final_state, routes)
+
+
+async def _astream_with_fallback(pipeline, fallback_coro_fn, key):
+    # a cached answer streams as a single result event
+    cached = result_cache.get(key)
+    if cached is not None:
+        _count("hit")
+        await pipeline.aclose()
+        yield "result", copy.deepcopy(cached)
+        return
+
+    _count("miss")
+    try:
+        async for event, data in pipeline:
+            if event == "result" and _cacheable(data):
+                result_cache.set(key, data)
+            yield event, data
     except Exception as e:
-        print(f"AI pipeline failed for get_best_route_by_duration, using fallback: {e}")
-        fallback = _fallback_from_maps(origin=origin, minutes=minutes)
+        logger.warning("AI pipeline failed while streaming, using fallback: %s", e)
+        yield "error", {"detail": str(e)}
+        try:
+            fallback = await fallback_coro_fn()
+        except Exception as fallback_error:
+            # end the stream cleanly: the client still gets "done" after this
+            logger.warning("Fallback failed while streaming: %s", fallback_error)
+            yield "error", {"detail": str(fallback_error)}
+            return
+        fallback["explanation"] += f" (fallback reason: {e})"
+        yield "result", fallback
+
+
+def astream_best_route(
+    origin: str,
+    destination: str,
+    user_query: str,
+    enrichment_queries: list[str],
+    scoring_mode: str | None = None,
+):
+    """Streaming get_best_route: async iterator of (event, data) pairs."""
+    partial = {}
+    pipeline = _astream_pipeline(
+        lambda locations: aget_many_routes(origin, destination, num_variations=3, locations=locations),
+        origin,
+        destination,
+        user_query,
+        enrichment_queries,
+        scoring_mode,
+        partial,
+    )
+    return _astream_with_fallback(
+        pipeline,
+        lambda: _afallback_from_maps(origin=origin, destination=destination, partial=partial),
+        _request_key("route", {
+            "origin": origin,
+            "destination": destination,
+            "user_query": user_query,
+            "enrichment_queries": enrichment_queries,
+            "scoring_mode": scoring_mode,
+        }),
+    )
+
+
+def astream_best_route_by_duration(
+    origin: str,
+    minutes: int,
+    user_query: str,
+    enrichment_queries: list[str],
+    scoring_mode: str | None = None,
+):
+    """Streaming get_best_route_by_duration: async iterator of (event, data) pairs."""
+    partial = {}
+    pipeline = _astream_pipeline(
+        lambda locations: aget_routes_by_duration(origin, minutes, locations=locations),
+        origin,
+        f"{minutes}-minute walk",
+        user_query,
+        enrichment_queries,
+        scoring_mode,
+        partial,
+    )
+    return _astream_with_fallback(
+        pipeline,
+        lambda: _afallback_from_maps(origin=origin, minutes=minutes, partial=partial),
+        _request_key("duration", {
+            "origin": origin,
+            "minutes": minutes,
+            "user_query": user_query,
+            "enrichment_queries": enrichment_queries,
+            "scoring_mode": scoring_mode,
+        }),
+    )
+
+
+# -------------------------
+# BATCH
+# -------------------------
+_BATCH_ARGS = {
+    "route": ("origin", "destination", "user_query", "enrichment_queries", "scoring_mode"),
+    "duration": ("origin", "minutes", "user_query", "enrichment_queries", "scoring_mode"),
+}
+
+
+def _batch_kind(item):
+    return "route" if item.get("destination") else "duration"
+
+
+def _batch_key(item):
+    """The result_cache key get_best_route / get_best_route_by_duration would use."""
+    kind = _batch_kind(item)
+    return _request_key(kind, {name: item.get(name) for name in _BATCH_ARGS[kind]})
+
+
+def _candidates_key(item):
+    """Items with equal keys have the same candidate routes."""
+    if _batch_kind(item) == "route":
+        return "route", normalize_key(item["origin"]), normalize_key(item["destination"])
+    return "duration", normalize_key(item["origin"]), item["minutes"]
+
+
+async def _afetch_candidates(item, locations):
+    if _batch_kind(item) == "route":
+        return await aget_many_routes(item["origin"], item["destination"], num_variations=3, locations=locations)
+    return await aget_routes_by_duration(item["origin"], item["minutes"], locations=locations)
+
+
+async def _aprepare_batch(leaders):
+    """
+    Fetch and enrich candidates for every distinct item, sharing upstream
+    work, and return {request key: partial} with the graph input in
+    partial["state"] (or the stage failure in partial["error"]).
+    """
+    # 1️⃣ each address once; the lookups below are then geocode cache hits
+    addresses = {
+        normalize_key(address): address
+        for item in leaders.values()
+        for address in (item["origin"], item.get("destination"))
+        if address
+    }
+    await _gather_bounded((ageocode_address(a) for a in addresses.values()), return_exceptions=True)
+
+    # 2️⃣ candidates once per origin/destination (or origin/minutes)
+    fetch_jobs = {}
+    for item in leaders.values():
+        fetch_jobs.setdefault(_candidates_key(item), item)
+    locations = {ck: {} for ck in fetch_jobs}
+    fetched = dict(zip(fetch_jobs, await _gather_bounded(
+        (_afetch_candidates(item, locations[ck]) for ck, item in fetch_jobs.items()),
+        limit=BATCH_CONCURRENCY,
+        return_exceptions=True,
+    )))
+
+    # 3️⃣ one Places plan per keyword over every route set that asks for
+    # it, then enrichment once per (route set, keywords)
+    enrich_jobs = {}
+    for item in leaders.values():
+        ck = _candidates_key(item)
+        if fetched[ck] and not isinstance(fetched[ck], Exception):
+            enrich_jobs.setdefault((ck, frozenset(item["enrichment_queries"])), item["enrichment_queries"])
+
+    by_query = {}
+    for (ck, _), queries in enrich_jobs.items():
+        for q in queries:
+            by_query.setdefault(q, {})[ck] = fetched[ck]
+    await _gather_bounded(
+        (aprefetch_places([r for routes in sets.values() for r in routes], [q]) for q, sets in by_query.items()),
+        limit=BATCH_CONCURRENCY,
+        return_exceptions=True,
+    )
+
+    enriched = dict(zip(enrich_jobs, await _gather_bounded(
+        (aenrich_routes(copy.deepcopy(fetched[ck]), queries) for (ck, _), queries in enrich_jobs.items()),
+        limit=BATCH_CONCURRENCY,
+        return_exceptions=True,
+    )))
+
+    # 4️⃣ graph inputs; every item gets its own copies to annotate
+    partials = {}
+    for key, item in leaders.items():
+        ck = _candidates_key(item)
+        partial = partials[key] = {"locations": locations[ck]}
+
+        routes = fetched[ck]
+        if isinstance(routes, Exception):
+            partial["error"] = routes
+            continue
+        if not routes:
+            partial["error"] = Exception("No routes available from Google Maps for the provided input.")
+            continue
+        partial["routes"] = copy.deepcopy(routes)
+
+        routes = enriched[(ck, frozenset(item["enrichment_queries"]))]
+        if isinstance(routes, Exception):
+            partial["error"] = routes
+            continue
+        partial["enriched_routes"] = copy.deepcopy(routes)
+
+        destination_label = item.get("destination") or f"{item['minutes']}-minute walk"
+        partial["state"] = initial_state(
+            item["origin"],
+            destination_label,
+            item["user_query"],
+            partial["enriched_routes"],
+            item["enrichment_queries"],
+            item.get("scoring_mode"),
+        )
+
+    return partials
+
+
+async def _afinish_batch_item(item, partial):
+    """Rest of the graph for one prepared item, with the usual fallback."""
+    try:
+        if "error" in partial:
+            raise partial.pop("error")
+
+        warm_up()
+        async for output in get_graph().astream(partial["state"], stream_mode="values"):
+            partial["state"] = output
+
+        return _agent_result(partial["state"], partial["enriched_routes"])
+    except Exception as e:
+        logger.warning("AI pipeline failed for batch item, using fallback: %s", e)
+        fallback = await _afallback_from_maps(
+            origin=item["origin"],
+            destination=item.get("destination"),
+            minutes=item.get("minutes"),
+            partial=partial,
+        )
         fallback["explanation"] += f" (fallback reason: {e})"
         return fallback
+
+
+async def astream_best_routes_batch(items: list[dict]):
+    """
+    Best route for each of `items` (get_best_route or get_best_route_by_duration
+    arguments as dicts), yielding (index, result) as each item finishes;
+    result is the exception if even the fallback failed.
+
+    Work is shared across the batch: identical items run once, each address
+    is geocoded once, each origin/destination (or origin/minutes) fetches
+    candidates once, Places coverage is planned over all route sets, and
+    intents and LLM route scores are requested several items per call.
+    """
+    runs = {}
+    for idx, item in enumerate(items):
+        key = _batch_key(item)
+        cached = result_cache.get(key)
+        if cached is not None:
+            _count("hit")
+            yield idx, copy.deepcopy(cached)
+        else:
+            runs.setdefault(key, []).append(idx)
+
+    if not runs:
+        return
+
+    leaders = {key: items[idxs[0]] for key, idxs in runs.items()}
+    for idxs in runs.values():
+        _count("miss")
+        for _ in idxs[1:]:
+            _count("coalesced")
+
+    partials = await _aprepare_batch(leaders)
+
+    # combined LLM calls; the graph's own nodes then find intents cached
+    # and LLM-mode routes already scored
+    ready = {key: p["state"] for key, p in partials.items() if "state" in p}
+    await aprefill_intents([state["query"] for state in ready.values()])
+
+    llm_states = []
+    for state in ready.values():
+        if (state.get("scoring_mode") or SCORING_MODE) == "llm":
+            state["preferences"] = await alookup_intent(state["query"])
+            llm_states.append(state)
+    await aprefill_scores(llm_states)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def finish(key):
+        async with semaphore:
+            try:
+                return key, await _afinish_batch_item(leaders[key], partials[key])
+            except Exception as e:
+                return key, e
+
+    tasks = [asyncio.ensure_future(finish(key)) for key in leaders]
+    try:
+        for done in asyncio.as_completed(tasks):
+            key, result = await done
+            # cached before yielding, so a consumer that stops early keeps it
+            if not isinstance(result, Exception) and _cacheable(result):
+                result_cache.set(key, result)
+            for idx in runs[key]:
+                yield idx, result if isinstance(result, Exception) else copy.deepcopy(result)
+    finally:
+        # the client went away (or the consumer stopped): drop unfinished items
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from backend.services.metrics_service import CACHE_LOOKUPS
+
+# Host-wide shared tier: one SQLite file (a table per namespace) that every
+# worker process on the host reads and writes. LOOPWALK_CACHE_REDIS_URL adds
+# a Redis-compatible tier behind it, shared between hosts.
+CACHE_PATH = os.getenv("LOOPWALK_CACHE_PATH")
+CACHE_REDIS_URL = os.getenv("LOOPWALK_CACHE_REDIS_URL")
+SHARED_CACHE_SIZE = int(os.getenv("LOOPWALK_SHARED_CACHE_SIZE", "100000"))
+
+
+def normalize_key(text: str) -> str:
+    """
+    Normalize free-text keys (addresses, queries) so trivial differences
+    in case, accents, spacing or punctuation hit the same cache entry.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.strip().lower()
+    text = re.sub(r"[\s,]+", " ", text)
+    text = re.sub(r"[^\w\s\-&'/#]", "", text)
+    return text.strip()
+
+
+class SqliteStore:
+    """
+    Small on-disk key/value store with per-entry expiry.
+    Runs in WAL mode so several uvicorn workers on the same host can share it.
+    """
+
+    tier = "sqlite"
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 100_000):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        # sqlite connections are not shareable across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """(value, expires_at) for a live entry, else None."""
+        row = self._conn().execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or row[1] < time.time():
+            return None
+
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl: float):
+        self.set_many([(key, value)], ttl)
+
+    def set_many(self, items, ttl: float):
+        """Write several (key, value) pairs in one transaction."""
+        expires_at = time.time() + ttl
+        rows = [(key, json.dumps(value), expires_at) for key, value in items]
+
+        conn = self._conn()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+        before = self._writes
+        self._writes += len(rows)
+        if self._writes // 1000 > before // 1000:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then the soonest-expiring ones above max_entries."""
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+
+class RedisStore:
+    """
+    Cache tier on a Redis-compatible server (Redis, Valkey, KeyDB, ...).
+    Keys are prefixed with the namespace and expire via SETEX; total size is
+    bounded by the server's maxmemory policy. Server errors count as misses.
+    """
+
+    tier = "redis"
+
+    def __init__(self, url: str, namespace: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("LOOPWALK_CACHE_REDIS_URL is set but the 'redis' package is not installed") from exc
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = f"loopwalk:{namespace}:"
+        self._errors = redis.RedisError
+
+    def get(self, key):
+        """(value, expires_at) for a live entry, else None."""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+            raw, ttl_ms = pipe.execute()
+        except self._errors:
+            return None
+        if raw is None or ttl_ms is None or ttl_ms < 0:
+            return None
+        return json.loads(raw), time.time() + ttl_ms / 1000
+
+    def set(self, key, value, ttl: float):
+        self.set_many([(key, value)], ttl)
+
+    def set_many(self, items, ttl: float):
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items:
+                pipe.setex(self.prefix + key, max(1, int(ttl)), json.dumps(value))
+            pipe.execute()
+        except self._errors:
+            pass
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a TTL.
+    Optional stores (SqliteStore, RedisStore) act as further tiers, tried
+    in order: misses fall through to them and their hits are promoted
+    back into memory and the tiers before them. Async code uses aget /
+    aset / aset_many, which do the shared-tier I/O in a worker thread.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        store: SqliteStore | None = None,
+        stores=(),
+        namespace: str | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stores = ([store] if store is not None else []) + list(stores)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self._get_memory(key)
+        return value if value is not None else self._get_stores(key)
+
+    async def aget(self, key):
+        """get for async callers: memory inline, store tiers in a worker thread."""
+        value = self._get_memory(key)
+        if value is not None or not self.stores:
+            return value if value is not None else self._get_stores(key)
+        return await asyncio.to_thread(self._get_stores, key)
+
+    def _get_memory(self, key):
+        now = time.time()
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    self._count("memory")
+                    return value
+                del self._data[key]
+
+        return None
+
+    def _get_stores(self, key):
+        for i, store in enumerate(self.stores):
+            entry = store.get(key)
+            if entry is not None:
+                # promoted copies expire with the original, not a fresh TTL
+                value, expires_at = entry
+                self._remember(key, value, expires_at)
+                for upper in self.stores[:i]:
+                    upper.set(key, value, expires_at - time.time())
+                with self._lock:
+                    self.hits += 1
+                self._count(store.tier)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        self._count("miss")
+        return None
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """Store several (key, value) pairs, one write per shared tier."""
+        items = list(items)
+        for key, value in items:
+            self._remember(key, value)
+        self._write_stores(items)
+
+    async def aset(self, key, value):
+        await self.aset_many([(key, value)])
+
+    async def aset_many(self, items):
+        """set_many for async callers: shared tiers are written in a worker thread."""
+        items = list(items)
+        for key, value in items:
+            self._remember(key, value)
+        if self.stores:
+            await asyncio.to_thread(self._write_stores, items)
+
+    def _write_stores(self, items):
+        for store in self.stores:
+            store.set_many(items, self.ttl)
+
+    def _count(self, tier):
+        if self.namespace:
+            CACHE_LOOKUPS.inc(namespace=self.namespace, tier=tier)
+
+    def _remember(self, key, value, expires_at=None):
+        with self._lock:
+            self._data[key] = (value, expires_at or time.time() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def tiered_cache(namespace: str, maxsize: int, ttl: float, path: str | None = None, shared_size: int | None = None):
+    """
+    TTLCache for `namespace`: an in-process LRU of `maxsize` entries, then
+    the host's SQLite file (`path`, else LOOPWALK_CACHE_PATH) holding up to
+    `shared_size` entries, then Redis when LOOPWALK_CACHE_REDIS_URL is set.
+    """
+    stores = []
+    path = path or CACHE_PATH
+    if path:
+        stores.append(SqliteStore(path, table=namespace, max_entries=shared_size or SHARED_CACHE_SIZE))
+    if CACHE_REDIS_URL:
+        stores.append(RedisStore(CACHE_REDIS_URL, namespace))
+
+    return TTLCache(maxsize=maxsize, ttl=ttl, stores=stores, namespace=namespace)
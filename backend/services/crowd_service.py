@@ -1,6 +1,30 @@
+import os
 import random
 import math
 
+import numpy as np
+
+from backend.services.raster_service import get_raster
+
+# Chicago downtown center approx
+CENTER_LAT = 41.8818
+CENTER_LNG = -87.6231
+
+# Precomputed raster built by `python -m backend.services.raster_service
+# build`; when set it replaces the mock below
+CROWD_RASTER_PATH = os.getenv("LOOPWALK_CROWD_RASTER_PATH")
+
+# Set LOOPWALK_SIGNAL_SEED for reproducible batch noise
+_rng = np.random.default_rng(
+    int(os.environ["LOOPWALK_SIGNAL_SEED"]) if os.getenv("LOOPWALK_SIGNAL_SEED") else None
+)
+
+
+def seed(value: int | None):
+    """Reseed the generator used by get_crowd_density_batch."""
+    global _rng
+    _rng = np.random.default_rng(value)
+
 
 def get_crowd_density(lat: float, lng: float) -> float:
     """
@@ -8,9 +32,8 @@ def get_crowd_density(lat: float, lng: float) -> float:
     Values roughly between 0.1 and 2.5
     """
 
-    # Chicago downtown center approx
-    center_lat = 41.8818
-    center_lng = -87.6231
+    center_lat = CENTER_LAT
+    center_lng = CENTER_LNG
 
     # distance from downtown center
     dist = math.sqrt((lat - center_lat) ** 2 + (lng - center_lng) ** 2)
@@ -21,4 +44,26 @@ def get_crowd_density(lat: float, lng: float) -> float:
     # add noise so routes differ slightly
     noise = random.uniform(-0.2, 0.2)
 
-    return round(max(0.1, base_density + noise), 2)
\ No newline at end of file
+    return round(max(0.1, base_density + noise), 2)
+
+
+def get_crowd_density_batch(lats, lngs, rng: np.random.Generator | None = None, hour: int | None = None) -> np.ndarray:
+    """
+    Vectorized get_crowd_density over arrays of latitudes and longitudes.
+    Pass `rng` to control the noise term; defaults to the module generator.
+    With CROWD_RASTER_PATH set, values come from the raster for hour-of-week `hour`
+    (default: now) instead.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+
+    if CROWD_RASTER_PATH:
+        return np.round(get_raster(CROWD_RASTER_PATH).sample(lats, lngs, hour), 2)
+
+    rng = rng or _rng
+
+    dist = np.hypot(lats - CENTER_LAT, lngs - CENTER_LNG)
+    base_density = np.maximum(0.2, 2.2 - dist * 150)
+    noise = rng.uniform(-0.2, 0.2, size=lats.shape)
+
+    return np.round(np.maximum(0.1, base_density + noise), 2)
@@ -1,9 +1,45 @@
+import asyncio
+import copy
 import requests
+from array import array
 import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import httpx
 import polyline
-from backend.services.crowd_service import get_crowd_density
-from backend.services.safety_service import get_crime_risk
+from requests.adapters import HTTPAdapter
+from backend.services.cache_service import normalize_key, tiered_cache
+from backend.services.crowd_service import get_crowd_density_batch
+from backend.services.metrics_service import (
+    UPSTREAM_ERRORS,
+    UPSTREAM_REQUESTS,
+    get_logger,
+    stage_timer,
+    timed,
+)
+from backend.services.rate_limit_service import (
+    MAX_RETRIES,
+    RETRYABLE_STATUSES,
+    CircuitBreaker,
+    GoogleAPIError,
+    SharedTokenBucket,
+    TokenBucket,
+    backoff_delay,
+)
+from backend.services.route_geometry import (
+    MAX_SAMPLES,
+    PLACES_SEARCH_RADIUS_M,
+    SAMPLE_SPACING_M,
+    RouteGeometry,
+    coverage_spacing,
+    hausdorff_distance,
+    route_shape_distance,
+)
+from backend.services.safety_service import get_crime_risk_batch
+from backend.services.walk_graph import get_walk_graph
 
 import math
 from urllib.parse import quote_plus
@@ -34,6 +70,330 @@ GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 STATIC_MAP_URL = "https://maps.googleapis.com/maps/api/staticmap"
 
+# Upper bound on concurrent Google calls issued by a single fan-out
+MAX_PARALLEL_REQUESTS = int(os.getenv("LOOPWALK_MAX_PARALLEL_REQUESTS", "8"))
+REQUEST_TIMEOUT_S = float(os.getenv("LOOPWALK_REQUEST_TIMEOUT_S", "10"))
+# Connection pool size of the shared async client (all in-flight requests)
+ASYNC_MAX_CONNECTIONS = int(os.getenv("LOOPWALK_ASYNC_MAX_CONNECTIONS", "100"))
+
+# Requests per second allowed per Google endpoint. Set LOOPWALK_RATE_LIMIT_PATH
+# to a file path to share the quota between all workers on the host.
+GOOGLE_QPS = {
+    "directions": float(os.getenv("LOOPWALK_DIRECTIONS_QPS", "50")),
+    "geocode": float(os.getenv("LOOPWALK_GEOCODE_QPS", "50")),
+    "places": float(os.getenv("LOOPWALK_PLACES_QPS", "50")),
+}
+RATE_LIMIT_PATH = os.getenv("LOOPWALK_RATE_LIMIT_PATH")
+
+# Caches below are in-process LRUs backed, when LOOPWALK_CACHE_PATH (and
+# optionally LOOPWALK_CACHE_REDIS_URL) is set, by tiers shared by all
+# workers; see cache_service.tiered_cache. *_SHARED_SIZE caps the shared tier.
+
+# Geocode cache: landmark origins repeat constantly, coordinates barely change.
+# LOOPWALK_GEOCODE_CACHE_PATH gives geocodes their own persistent file.
+GEOCODE_CACHE_TTL_S = float(os.getenv("LOOPWALK_GEOCODE_CACHE_TTL_S", str(7 * 24 * 3600)))
+GEOCODE_CACHE_SIZE = int(os.getenv("LOOPWALK_GEOCODE_CACHE_SIZE", "2048"))
+GEOCODE_CACHE_PATH = os.getenv("LOOPWALK_GEOCODE_CACHE_PATH")
+GEOCODE_SHARED_SIZE = int(os.getenv("LOOPWALK_GEOCODE_SHARED_SIZE", "100000"))
+
+# Directions cache: Google routes per (origin, destination, waypoint).
+DIRECTIONS_CACHE_TTL_S = float(os.getenv("LOOPWALK_DIRECTIONS_CACHE_TTL_S", "3600"))
+DIRECTIONS_CACHE_SIZE = int(os.getenv("LOOPWALK_DIRECTIONS_CACHE_SIZE", "1024"))
+DIRECTIONS_SHARED_SIZE = int(os.getenv("LOOPWALK_DIRECTIONS_SHARED_SIZE", "20000"))
+
+# Places cache: results are stored per (keyword, grid tile) and shared by
+# every sample point / candidate route that searches inside the tile. The
+# default side gives tiles a circumradius of twice the search radius, so a
+# sample search (widened ones are capped at the circumradius) is served
+# by its own tile.
+PLACES_TILE_M = float(
+    os.getenv("LOOPWALK_PLACES_TILE_M", str(round(2 * coverage_spacing(PLACES_SEARCH_RADIUS_M))))
+)
+PLACES_CACHE_TTL_S = float(os.getenv("LOOPWALK_PLACES_CACHE_TTL_S", str(24 * 3600)))
+PLACES_CACHE_SIZE = int(os.getenv("LOOPWALK_PLACES_CACHE_SIZE", "20000"))
+PLACES_SHARED_SIZE = int(os.getenv("LOOPWALK_PLACES_SHARED_SIZE", "500000"))
+# Coverage planner: before enrichment, uncached tiles of all candidate
+# routes are first searched as blocks of 2^level x 2^level tiles (largest
+# first). 0 disables the planner.
+PLACES_PLAN_LEVELS = int(os.getenv("LOOPWALK_PLACES_PLAN_LEVELS", "2"))
+# Tiles per keyword the planner fetches first to gauge how dense it is
+PLACES_PLAN_SAMPLES = int(os.getenv("LOOPWALK_PLACES_PLAN_SAMPLES", "2"))
+# nearbysearch returns at most one page of 20; a full page may be truncated
+PLACES_PAGE_SIZE = 20
+# A tile search that comes back full is redone as four smaller circles, up
+# to this many times; a tile still full after that is not cached.
+PLACES_SPLIT_DEPTH = int(os.getenv("LOOPWALK_PLACES_SPLIT_DEPTH", "3"))
+
+# By-duration search: routes whose walking time is within this fraction of
+# the requested minutes are kept; the search stops once this many bearings
+# produced one, or after DURATION_MAX_ROUNDS rounds of radius adjustment.
+DURATION_TOLERANCE = float(os.getenv("LOOPWALK_DURATION_TOLERANCE", "0.15"))
+DURATION_CANDIDATES = int(os.getenv("LOOPWALK_DURATION_CANDIDATES", "4"))
+DURATION_MAX_ROUNDS = int(os.getenv("LOOPWALK_DURATION_MAX_ROUNDS", "3"))
+WALK_M_PER_MIN = 80  # first guess of straight-line progress per walking minute
+
+# Routes whose shapes differ by less than this are treated as duplicates
+DEDUP_TOLERANCE_M = float(os.getenv("LOOPWALK_DEDUP_TOLERANCE_M", "40"))
+DEDUP_METRIC = os.getenv("LOOPWALK_DEDUP_METRIC", "frechet")  # or "hausdorff"
+
+# Where candidate routes come from: "google" (Directions API) or "local"
+# (A* over the walking graph built by `python -m backend.services.walk_graph
+# build`); geocoding and Places still use Google either way.
+ROUTE_ENGINE = os.getenv("LOOPWALK_ROUTE_ENGINE", "google")
+WALK_GRAPH_PATH = os.getenv("LOOPWALK_WALK_GRAPH_PATH", "data/walk_graph")
+LOCAL_ALTERNATIVES = int(os.getenv("LOOPWALK_LOCAL_ALTERNATIVES", "3"))
+
+_M_PER_DEG_LAT = 111_320
+_TILE_LAT_STEP = PLACES_TILE_M / _M_PER_DEG_LAT
+# circumradius of a tile (+1 m so corners are not clipped by rounding)
+_TILE_RADIUS_M = math.ceil(PLACES_TILE_M * math.sqrt(2) / 2) + 1
+# Each tile caches every place within this distance of its center, which
+# covers any search of up to _TILE_RADIUS_M around a point inside the tile:
+# such a search needs just that one tile.
+_TILE_REACH_M = 2 * _TILE_RADIUS_M
+
+
+# -------------------------
+# HTTP SESSION
+# -------------------------
+def _build_session():
+    """Shared keep-alive session so fan-out calls reuse pooled connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=MAX_PARALLEL_REQUESTS,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _build_session()
+geocode_cache = tiered_cache(
+    "geocode", GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL_S,
+    path=GEOCODE_CACHE_PATH, shared_size=GEOCODE_SHARED_SIZE,
+)
+directions_cache = tiered_cache(
+    "directions", DIRECTIONS_CACHE_SIZE, DIRECTIONS_CACHE_TTL_S, shared_size=DIRECTIONS_SHARED_SIZE,
+)
+places_cache = tiered_cache("places", PLACES_CACHE_SIZE, PLACES_CACHE_TTL_S, shared_size=PLACES_SHARED_SIZE)
+_tile_locks = {}
+_tile_locks_guard = threading.Lock()
+# in-flight async tile loads, per event loop: a Task must only be awaited
+# on the loop that runs it
+_atile_tasks = weakref.WeakKeyDictionary()
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_PARALLEL_REQUESTS,
+    thread_name_prefix="loopwalk-maps",
+)
+logger = get_logger("maps")
+
+
+# -------------------------
+# REQUEST POLICY
+# -------------------------
+# Every Google request waits for a token from its endpoint's bucket, is
+# retried with jittered backoff on retryable statuses, and is refused
+# outright while that endpoint's circuit breaker is open.
+_ENDPOINT_NAMES = {
+    DIRECTIONS_URL: "directions",
+    GEOCODE_URL: "geocode",
+    PLACES_URL: "places",
+}
+
+
+def _build_limiter(endpoint, rate):
+    if RATE_LIMIT_PATH:
+        return SharedTokenBucket(RATE_LIMIT_PATH, endpoint, rate)
+    return TokenBucket(rate)
+
+
+_limiters = {name: _build_limiter(name, qps) for name, qps in GOOGLE_QPS.items()}
+_breakers = {name: CircuitBreaker(name) for name in GOOGLE_QPS}
+
+
+def _decode_response(res):
+    """Response JSON, with throttling / server errors mapped to a retryable status."""
+    if res.status_code == 429:
+        return {"status": "HTTP_429"}
+    if res.status_code >= 500:
+        return {"status": "HTTP_5XX", "error_message": f"HTTP {res.status_code}"}
+    try:
+        return res.json()
+    except ValueError:
+        # e.g. an HTML error page from a proxy
+        return {"status": "INVALID_RESPONSE", "error_message": f"HTTP {res.status_code}, non-JSON body"}
+
+
+def _http_get(url, params):
+    try:
+        res = _session.get(url, params=params, timeout=REQUEST_TIMEOUT_S)
+    except requests.RequestException as e:
+        return {"status": "TRANSPORT_ERROR", "error_message": str(e)}
+    return _decode_response(res)
+
+
+def _settled(endpoint, data, attempt):
+    """
+    Book the outcome of one attempt with the breaker. True when `data` is
+    final; raises GoogleAPIError once a retryable failure runs out of retries.
+    """
+    status = data.get("status")
+    breaker = _breakers[endpoint]
+
+    if status not in RETRYABLE_STATUSES:
+        breaker.record_success()
+        return True
+
+    UPSTREAM_ERRORS.inc(endpoint=endpoint, status=status)
+    if breaker.record_failure():
+        logger.warning("Google %s circuit opened after repeated %s", endpoint, status)
+
+    if attempt >= MAX_RETRIES:
+        raise GoogleAPIError(endpoint, status, data.get("error_message"))
+    return False
+
+
+def _google_get(url, params):
+    endpoint = _ENDPOINT_NAMES[url]
+
+    breaker = _breakers[endpoint]
+
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.allow()
+        try:
+            _limiters[endpoint].acquire()
+            UPSTREAM_REQUESTS.inc(endpoint=endpoint)
+            data = _http_get(url, params)
+        except BaseException:
+            # never reached _settled; don't leave a half-open probe hanging
+            breaker.release_probe()
+            raise
+
+        if _settled(endpoint, data, attempt):
+            return data
+
+        time.sleep(backoff_delay(attempt))
+
+
+_async_client = None
+_async_client_loop = None
+
+
+def _get_async_client():
+    """Shared keep-alive httpx client, recreated if the event loop changes."""
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_S,
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_MAX_CONNECTIONS,
+            ),
+        )
+        _async_client_loop = loop
+
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+
+
+async def _ahttp_get(url, params):
+    try:
+        res = await _get_async_client().get(url, params=params)
+    except httpx.HTTPError as e:
+        return {"status": "TRANSPORT_ERROR", "error_message": str(e)}
+    return _decode_response(res)
+
+
+async def _agoogle_get(url, params):
+    endpoint = _ENDPOINT_NAMES[url]
+
+    breaker = _breakers[endpoint]
+
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.allow()
+        try:
+            await _limiters[endpoint].aacquire()
+            UPSTREAM_REQUESTS.inc(endpoint=endpoint)
+            data = await _ahttp_get(url, params)
+        except BaseException:
+            # cancelled or failed before an outcome: free the probe slot
+            breaker.release_probe()
+            raise
+
+        if _settled(endpoint, data, attempt):
+            return data
+
+        await asyncio.sleep(backoff_delay(attempt))
+
+
+async def _gather_bounded(coros, limit=MAX_PARALLEL_REQUESTS, return_exceptions=False):
+    """asyncio.gather with at most `limit` coroutines in flight; keeps input order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros), return_exceptions=return_exceptions)
+
+
+def _capture(fn, *args):
+    """Call fn(*args), returning the exception instead of raising it."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def _join_routes(results):
+    """
+    Flatten per-call route lists. Failed calls are skipped as long as some
+    call succeeded; if all of them failed the first error is raised, so a
+    quota or outage problem is never mistaken for "no routes".
+    """
+    routes = []
+    errors = []
+    for r in results:
+        if isinstance(r, Exception):
+            errors.append(r)
+        else:
+            routes.extend(r)
+
+    if errors and not routes:
+        raise errors[0]
+    if errors:
+        logger.warning("%d of %d Directions calls failed: %s", len(errors), len(results), errors[0])
+
+    return routes
+
+
+def fetch_routes_many(calls):
+    """
+    Run several fetch_routes calls concurrently.
+    `calls` is a list of (origin_latlng, dest_latlng, waypoint) tuples.
+    Results are flattened in the same order as `calls`, so route indices
+    stay deterministic regardless of which call finishes first.
+    """
+    return _join_routes(list(_executor.map(lambda args: _capture(fetch_routes, *args), calls)))
+
+
+async def afetch_routes_many(calls):
+    """Async fetch_routes_many; same ordering guarantee."""
+    results = await _gather_bounded(
+        (afetch_routes(*args) for args in calls), return_exceptions=True
+    )
+    return _join_routes(results)
+
 
 # -------------------------
 # GEOCODING
@@ -45,11 +405,18 @@ def decode_route_polyline(route):
     encoded = route["overview_polyline"]["points"]
     return polyline.decode(encoded)  # returns [(lat,lng), ...]
 
-def sample_route_points(coords, step=15):
+def sample_route_points(coords, spacing_m=None, max_points=MAX_SAMPLES):
     """
-    Take every Nth point along the route.
+    Points every `spacing_m` metres (default SAMPLE_SPACING_M) along the
+    route, at most `max_points` of them.
     """
-    return coords[::step]
+    geometry = RouteGeometry(
+        array("d", (lat for lat, _ in coords)),
+        array("d", (lng for _, lng in coords)),
+        spacing_m=spacing_m or SAMPLE_SPACING_M,
+        max_samples=max_points,
+    )
+    return list(geometry.samples())
 
 
 def build_static_map_url(route, width=900, height=500, zoom=14):
@@ -87,54 +454,579 @@ def build_static_map_url(route, width=900, height=500, zoom=14):
         f"&key={GOOGLE_API_KEY}"
     )
 
-def search_places(lat, lng, query, radius=75):
-    params = {
+# -------------------------
+# PLACES (tile cache)
+# -------------------------
+def _tile_lng_step(row):
+    """Longitude width of a tile row, so tiles stay ~PLACES_TILE_M wide at any latitude."""
+    center_lat = (row + 0.5) * _TILE_LAT_STEP
+    return PLACES_TILE_M / (_M_PER_DEG_LAT * math.cos(math.radians(center_lat)))
+
+
+def _tile_of(lat, lng):
+    row = math.floor(lat / _TILE_LAT_STEP)
+    col = math.floor(lng / _tile_lng_step(row))
+    return row, col
+
+
+def _tile_bounds(row, col):
+    lng_step = _tile_lng_step(row)
+    return (
+        row * _TILE_LAT_STEP,
+        col * lng_step,
+        (row + 1) * _TILE_LAT_STEP,
+        (col + 1) * lng_step,
+    )
+
+
+def _tiles_for_search(lat, lng, radius):
+    """
+    Tiles whose cached places cover the search circle around (lat, lng):
+    the sample's own tile for radius <= _TILE_RADIUS_M, more for wider ones.
+    """
+    return _tiles_covering(lat, lng, max(0.0, radius - _TILE_RADIUS_M))
+
+
+def _sample_search_radius(geometry):
+    """
+    Places search radius for a route's samples; routes sampled wider than
+    the search radius covers are capped at the tile circumradius, so each
+    sample search still reads a single tile.
+    """
+    return geometry.search_radius(PLACES_SEARCH_RADIUS_M, _TILE_RADIUS_M)
+
+
+def _tiles_covering(lat, lng, radius):
+    """All grid tiles that intersect the circle around (lat, lng)."""
+    dlat = radius / _M_PER_DEG_LAT
+    row_min, _ = _tile_of(lat - dlat, lng)
+    row_max, _ = _tile_of(lat + dlat, lng)
+
+    tiles = []
+    for row in range(row_min, row_max + 1):
+        lng_step = _tile_lng_step(row)
+        # widest point of the circle, measured at its most poleward latitude
+        dlng = radius / (_M_PER_DEG_LAT * math.cos(math.radians(abs(lat) + dlat)))
+        col_min = math.floor((lng - dlng) / lng_step)
+        col_max = math.floor((lng + dlng) / lng_step)
+        tiles.extend((row, col) for col in range(col_min, col_max + 1))
+
+    return tiles
+
+
+def _nearby_params(lat, lng, query, radius):
+    return {
         "location": f"{lat},{lng}",
         "radius": radius,
         "keyword": query,
         "key": GOOGLE_API_KEY,
     }
 
-    res = requests.get(PLACES_URL, params=params)
-    data = res.json()
 
+def _parse_nearby(data):
+    if data.get("status") not in ("OK", "ZERO_RESULTS"):
+        raise GoogleAPIError("places", data.get("status"), data.get("error_message"))
+    return data.get("results", [])
+
+
+def _nearby_search(lat, lng, query, radius):
+    return _parse_nearby(_google_get(PLACES_URL, _nearby_params(lat, lng, query, radius)))
+
+
+async def _anearby_search(lat, lng, query, radius):
+    return _parse_nearby(await _agoogle_get(PLACES_URL, _nearby_params(lat, lng, query, radius)))
+
+
+def _sub_circles(lat, lng, radius):
+    """Four circles, one per quadrant of the square around a search circle, that cover it."""
+    dlat = radius / 2 / _M_PER_DEG_LAT
+    dlng = dlat / math.cos(math.radians(lat))
+    sub_radius = math.ceil(radius / math.sqrt(2))
+    return [(lat + sy * dlat, lng + sx * dlng, sub_radius) for sy in (-1, 1) for sx in (-1, 1)]
+
+
+def _merge_pages(lat, lng, radius, pages):
+    """Distinct places from overlapping searches that lie inside the circle."""
+    merged = {}
+    for page in pages:
+        for p in page:
+            merged.setdefault(p.get("place_id") or id(p), p)
+
+    return [
+        p for p in merged.values()
+        if haversine_m(lat, lng, p["geometry"]["location"]["lat"], p["geometry"]["location"]["lng"]) <= radius
+    ]
+
+
+def _nearby_all(lat, lng, query, radius, depth=None):
+    """
+    Every place in the circle as (places, complete). A full page may be
+    truncated, so the circle is searched again as four smaller ones (see
+    _sub_circles); complete is False if a page is still full `depth`
+    splits down (PLACES_SPLIT_DEPTH by default).
+    """
+    depth = PLACES_SPLIT_DEPTH if depth is None else depth
+    results = _nearby_search(lat, lng, query, radius)
+    if len(results) < PLACES_PAGE_SIZE:
+        return results, True
+    if depth <= 0:
+        return results, False
+
+    parts = [_nearby_all(*circle[:2], query, circle[2], depth - 1) for circle in _sub_circles(lat, lng, radius)]
+    return (
+        _merge_pages(lat, lng, radius, [results] + [places for places, _ in parts]),
+        all(complete for _, complete in parts),
+    )
+
+
+async def _anearby_all(lat, lng, query, radius, depth=None):
+    """Async _nearby_all."""
+    depth = PLACES_SPLIT_DEPTH if depth is None else depth
+    results = await _anearby_search(lat, lng, query, radius)
+    if len(results) < PLACES_PAGE_SIZE:
+        return results, True
+    if depth <= 0:
+        return results, False
+
+    parts = await _gather_bounded(
+        _anearby_all(*circle[:2], query, circle[2], depth - 1) for circle in _sub_circles(lat, lng, radius)
+    )
+    return (
+        _merge_pages(lat, lng, radius, [results] + [places for places, _ in parts]),
+        all(complete for _, complete in parts),
+    )
+
+
+def _tile_key(row, col, query):
+    return f"{normalize_key(query)}:{PLACES_TILE_M}:{_TILE_REACH_M}:{row}:{col}"
+
+
+def _tile_search_center(row, col):
+    south, west, north, east = _tile_bounds(row, col)
+    return (south + north) / 2, (west + east) / 2
+
+
+def _places_near_tile(row, col, results):
+    """Results within _TILE_REACH_M of the tile center."""
+    center_lat, center_lng = _tile_search_center(row, col)
+
+    return [
+        p for p in results
+        if haversine_m(
+            center_lat, center_lng, p["geometry"]["location"]["lat"], p["geometry"]["location"]["lng"]
+        ) <= _TILE_REACH_M
+    ]
+
+
+def _fetch_tile(row, col, query):
+    """
+    Places within _TILE_REACH_M of one grid tile's center for a keyword,
+    served from places_cache; fetched with a single nearbysearch unless
+    that comes back full (see _nearby_all).
+    """
+    key = _tile_key(row, col, query)
+
+    cached = places_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # one upstream call per tile, even when several routes ask at once
+    with _tile_locks_guard:
+        lock = _tile_locks.setdefault(key, threading.Lock())
+
+    try:
+        with lock:
+            cached = places_cache.get(key)
+            if cached is not None:
+                return cached
+
+            center_lat, center_lng = _tile_search_center(row, col)
+            results, complete = _nearby_all(center_lat, center_lng, query, _TILE_REACH_M)
+
+            places = _places_near_tile(row, col, results)
+            _remember_tile(key, places, complete)
+    finally:
+        with _tile_locks_guard:
+            _tile_locks.pop(key, None)
+
+    return places
+
+
+async def _afetch_tile(row, col, query):
+    """Async _fetch_tile; concurrent misses on a tile await one shared task."""
+    key = _tile_key(row, col, query)
+
+    cached = await places_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    tasks = _atile_tasks.setdefault(asyncio.get_running_loop(), {})
+    task = tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_aload_tile(row, col, query, key))
+        tasks[key] = task
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+
+    # shield: one waiter being cancelled must not cancel the shared load
+    return await asyncio.shield(task)
+
+
+async def _aload_tile(row, col, query, key):
+    center_lat, center_lng = _tile_search_center(row, col)
+    results, complete = await _anearby_all(center_lat, center_lng, query, _TILE_REACH_M)
+
+    places = _places_near_tile(row, col, results)
+    if complete:
+        await places_cache.aset(key, places)
+    else:
+        _warn_truncated(key)
+
+    return places
+
+
+def _remember_tile(key, places, complete):
+    if complete:
+        places_cache.set(key, places)
+    else:
+        _warn_truncated(key)
+
+
+def _warn_truncated(key):
+    # a truncated list must not be served as the tile's contents for a day
+    logger.warning("Places tile %s still full after %d splits; not cached", key, PLACES_SPLIT_DEPTH)
+
+
+# -------------------------
+# PLACES (coverage planner)
+# -------------------------
+# One nearbysearch per block of tiles instead of one per tile. A block
+# search that returns less than a full page holds every place in its
+# circle, so it seeds the tile cache for all tiles inside the circle.
+# A full block is a wasted call, so the planner first fetches a few tiles
+# per keyword (needed anyway) and only searches blocks expected to hold
+# well under a page; blocks that still come back full are remembered as
+# dense and nothing inside them is searched as a block again. Tiles left
+# over are fetched one by one as before.
+
+# blocks expected to hold more places than this are not searched, so few
+# of the block searches made come back full
+_PLAN_MAX_EXPECTED = PLACES_PAGE_SIZE * 0.75
+
+def _block_side_m(level):
+    return PLACES_TILE_M * 2 ** level
+
+
+def _block_of(lat, lng, level):
+    side = _block_side_m(level)
+    lat_step = side / _M_PER_DEG_LAT
+    row = math.floor(lat / lat_step)
+    lng_step = side / (_M_PER_DEG_LAT * math.cos(math.radians((row + 0.5) * lat_step)))
+    return row, math.floor(lng / lng_step)
+
+
+def _block_center(row, col, level):
+    side = _block_side_m(level)
+    lat_step = side / _M_PER_DEG_LAT
+    center_lat = (row + 0.5) * lat_step
+    lng_step = side / (_M_PER_DEG_LAT * math.cos(math.radians(center_lat)))
+    return center_lat, (col + 0.5) * lng_step
+
+
+def _block_radius(center_lat, center_lng, tiles):
+    # just holds the reach circles of the block's pending tiles
+    farthest = max(haversine_m(center_lat, center_lng, *_tile_search_center(*t)) for t in tiles)
+    return math.ceil(farthest) + _TILE_REACH_M
+
+
+def _dense_key(level, row, col, query):
+    return f"dense:{normalize_key(query)}:{PLACES_TILE_M}:{_TILE_REACH_M}:{level}:{row}:{col}"
+
+
+def _uncached_tiles(geometries, queries):
+    """(tile, query) pairs the routes' sample searches need that are not cached yet."""
+    tiles = set()
+    for geometry in geometries:
+        radius = _sample_search_radius(geometry)
+        for lat, lng in geometry.samples():
+            tiles.update(_tiles_for_search(lat, lng, radius))
+
+    return {
+        (tile, q)
+        for q in queries
+        for tile in tiles
+        if places_cache.get(_tile_key(*tile, q)) is None
+    }
+
+
+def _density_samples(pending):
+    """A few well-spread pending tiles per keyword, fetched first to gauge its density."""
+    by_query = {}
+    for tile, q in sorted(pending):
+        by_query.setdefault(q, []).append(tile)
+
+    samples = []
+    for q, tiles in by_query.items():
+        k = min(PLACES_PLAN_SAMPLES, len(tiles))
+        samples.extend((tiles[(2 * i + 1) * len(tiles) // (2 * k)], q) for i in range(k))
+    return samples
+
+
+def _place_density(samples):
+    """Places per m² for each keyword from its sample tiles; inf if one is not cached."""
+    area = math.pi * _TILE_REACH_M ** 2
+    counts = {}
+    for tile, q in samples:
+        places = places_cache.get(_tile_key(*tile, q))
+        n, total = counts.get(q, (0, 0.0))
+        counts[q] = (n + 1, total + (len(places) if places is not None else math.inf))
+
+    # +1: two empty samples do not prove a keyword is absent everywhere
+    return {q: (total + 1) / (n * area) for q, (n, total) in counts.items()}
+
+
+def _inside_dense_block(tile, q, level):
+    """Whether a block above `level` that holds the tile came back full."""
+    center = _tile_search_center(*tile)
+    return any(
+        places_cache.get(_dense_key(upper, *_block_of(*center, upper), q)) is not None
+        for upper in range(level + 1, PLACES_PLAN_LEVELS + 1)
+    )
+
+
+def _block_jobs(pending, level, density):
+    """
+    Group pending tiles into blocks worth one search: 2+ tiles, not known
+    dense, not inside a dense block, and expected to hold under
+    _PLAN_MAX_EXPECTED places at the keyword's `density`.
+    """
+    blocks = {}
+    for tile, q in pending:
+        if _inside_dense_block(tile, q, level):
+            continue
+        row, col = _block_of(*_tile_search_center(*tile), level)
+        blocks.setdefault((row, col, q), []).append(tile)
+
+    jobs = []
+    for (row, col, q), tiles in blocks.items():
+        if len(tiles) < 2 or places_cache.get(_dense_key(level, row, col, q)) is not None:
+            continue
+        job = (row, col, q, tiles)
+        radius = _block_search_args(level, job)[3]
+        if density.get(q, 0.0) * math.pi * radius ** 2 <= _PLAN_MAX_EXPECTED:
+            jobs.append(job)
+
+    return jobs
+
+
+def _apply_blocks(level, jobs, results, pending):
+    for job, found in zip(jobs, results):
+        _apply_block(level, job, found, pending)
+
+
+def _apply_block(level, job, results, pending):
+    row, col, q, tiles = job
+
+    # a failed (or cancelled) block search says nothing about its tiles:
+    # write neither tiles nor the dense marker, they stay pending and are
+    # fetched individually
+    if not isinstance(results, list):
+        return
+    if len(results) >= PLACES_PAGE_SIZE:
+        places_cache.set(_dense_key(level, row, col, q), True)
+        return
+
+    # one shared-tier write for the whole block
+    places_cache.set_many(
+        (_tile_key(*tile, q), _places_near_tile(*tile, results)) for tile in tiles
+    )
+    for tile in tiles:
+        pending.discard((tile, q))
+
+
+def _block_search_args(level, job):
+    row, col, q, tiles = job
+    center = _block_center(row, col, level)
+    return (*center, q, _block_radius(*center, tiles))
+
+
+def plan_places(geometries, queries):
+    """
+    Fill places_cache for every tile the routes' sample searches will touch,
+    using as few nearbysearch calls as possible across all routes. Returns
+    the number of upstream searches made.
+    """
+    pending = _uncached_tiles(geometries, queries)
+    samples = _density_samples(pending)
+    pending.difference_update(samples)
+    list(_executor.map(lambda item: _capture(_fetch_tile, *item[0], item[1]), samples))
+    density = _place_density(samples)
+    calls = len(samples)
+
+    for level in range(PLACES_PLAN_LEVELS, 0, -1):
+        jobs = _block_jobs(pending, level, density)
+        results = _executor.map(
+            lambda job: _capture(_nearby_search, *_block_search_args(level, job)), jobs
+        )
+        _apply_blocks(level, jobs, results, pending)
+        calls += len(jobs)
+
+    # failures here are left for search_places to retry and report
+    list(_executor.map(lambda item: _capture(_fetch_tile, *item[0], item[1]), pending))
+
+    return calls + len(pending)
+
+
+async def aplan_places(geometries, queries):
+    """Async plan_places; cache lookups and writes run in worker threads."""
+    pending = await asyncio.to_thread(_uncached_tiles, geometries, queries)
+    samples = _density_samples(pending)
+    pending.difference_update(samples)
+    await _gather_bounded((_afetch_tile(*tile, q) for tile, q in samples), return_exceptions=True)
+    density = await asyncio.to_thread(_place_density, samples)
+    calls = len(samples)
+
+    for level in range(PLACES_PLAN_LEVELS, 0, -1):
+        jobs = await asyncio.to_thread(_block_jobs, pending, level, density)
+        results = await _gather_bounded(
+            (_anearby_search(*_block_search_args(level, job)) for job in jobs),
+            return_exceptions=True,
+        )
+        await asyncio.to_thread(_apply_blocks, level, jobs, results, pending)
+        calls += len(jobs)
+
+    await _gather_bounded(
+        (_afetch_tile(*tile, q) for tile, q in pending), return_exceptions=True
+    )
+
+    return calls + len(pending)
+
+
+@timed("search_places")
+def search_places(lat, lng, query, radius=75):
+    tiles = [_fetch_tile(row, col, query) for row, col in _tiles_for_search(lat, lng, radius)]
+    return _places_within(lat, lng, radius, tiles)
+
+
+@timed("search_places")
+async def asearch_places(lat, lng, query, radius=75):
+    tiles = await _gather_bounded(
+        _afetch_tile(row, col, query) for row, col in _tiles_for_search(lat, lng, radius)
+    )
+    return _places_within(lat, lng, radius, tiles)
+
+
+def _places_within(lat, lng, radius, tiles):
+    """Places from the covering tiles that lie inside the search circle."""
     valid_places = []
+    seen = set()
 
-    for p in data.get("results", []):
-        plat = p["geometry"]["location"]["lat"]
-        plng = p["geometry"]["location"]["lng"]
+    for tile_places in tiles:
+        for p in tile_places:
+            # tile reaches overlap, so wide searches can see a place twice
+            place_key = p.get("place_id") or id(p)
+            if place_key in seen:
+                continue
+            seen.add(place_key)
 
-        dist = haversine_m(lat, lng, plat, plng)
+            plat = p["geometry"]["location"]["lat"]
+            plng = p["geometry"]["location"]["lng"]
 
-        # Only keep if truly within radius
-        if dist <= radius:
-            p["distance_m"] = round(dist, 1)
-            valid_places.append(p)
+            dist = haversine_m(lat, lng, plat, plng)
+
+            # Only keep if truly within radius
+            if dist <= radius:
+                # cached dicts are shared, never annotate them in place
+                p = dict(p)
+                p["distance_m"] = round(dist, 1)
+                valid_places.append(p)
 
     return valid_places
 
-def deduplicate_routes(routes):
-    seen = set()
+def deduplicate_routes(routes, tolerance_m=None, metric=None):
+    """
+    Drop routes whose shape is within `tolerance_m` of an earlier route.
+    Polylines are resampled to evenly spaced points and compared with a
+    shape distance (discrete Fréchet by default). Order is preserved and
+    the first route of each near-duplicate group is kept.
+    """
+    tolerance_m = DEDUP_TOLERANCE_M if tolerance_m is None else tolerance_m
+    metric = metric or DEDUP_METRIC
+
+    if tolerance_m <= 0 or len(routes) < 2:
+        return routes
+
+    ref_lat = None
     unique = []
+    kept_shapes = []
 
     for r in routes:
-        poly = r["polyline"]
-        if poly not in seen:
-            seen.add(poly)
+        geometry = RouteGeometry.from_route(r)
+        if ref_lat is None and len(geometry):
+            ref_lat = geometry.lats[0]
+        shape = geometry.shape(ref_lat=ref_lat)
+
+        duplicate = False
+        if len(shape):
+            for other in kept_shapes:
+                # Hausdorff <= Fréchet, so it is a cheap lower bound to prune on
+                if hausdorff_distance(shape, other) > tolerance_m:
+                    continue
+                if metric == "hausdorff" or route_shape_distance(shape, other, metric) <= tolerance_m:
+                    duplicate = True
+                    break
+
+        if not duplicate:
             unique.append(r)
+            if len(shape):
+                kept_shapes.append(shape)
 
     return unique
 
 
-def geocode_address(address: str):
-    params = {
+async def _adeduplicate_routes(routes, tolerance_m=None):
+    """deduplicate_routes in the executor: the Fréchet DP is pure Python."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, deduplicate_routes, routes, tolerance_m)
+
+
+def _geocode_params(address: str):
+    return {
         "address": address,
         "key": GOOGLE_API_KEY,
     }
 
-    res = requests.get(GEOCODE_URL, params=params)
-    data = res.json()
 
+@timed("geocode")
+def geocode_address(address: str):
+    key = normalize_key(address)
+
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    result = _parse_geocode(_google_get(GEOCODE_URL, _geocode_params(address)))
+
+    # only successful lookups are cached
+    geocode_cache.set(key, result)
+
+    return dict(result)
+
+
+@timed("geocode")
+async def ageocode_address(address: str):
+    key = normalize_key(address)
+
+    cached = await geocode_cache.aget(key)
+    if cached is not None:
+        return dict(cached)
+
+    result = _parse_geocode(await _agoogle_get(GEOCODE_URL, _geocode_params(address)))
+    await geocode_cache.aset(key, result)
+
+    return dict(result)
+
+
+def _parse_geocode(data):
     if data.get("status") != "OK":
         raise Exception(f"Geocoding failed: {data.get('status')}")
 
@@ -149,7 +1041,7 @@ def geocode_address(address: str):
 # -------------------------
 # SINGLE ROUTE REQUEST
 # -------------------------
-def fetch_routes(origin_latlng, dest_latlng, waypoint=None):
+def _directions_params(origin_latlng, dest_latlng, waypoint=None):
     params = {
         "origin": f"{origin_latlng['lat']},{origin_latlng['lng']}",
         "destination": f"{dest_latlng['lat']},{dest_latlng['lng']}",
@@ -161,25 +1053,125 @@ def fetch_routes(origin_latlng, dest_latlng, waypoint=None):
     if waypoint:
         params["waypoints"] = f"{waypoint['lat']},{waypoint['lng']}"
 
-    res = requests.get(DIRECTIONS_URL, params=params)
-    data = res.json()
+    return params
 
-    if data.get("status") != "OK":
+
+def _parse_directions(data):
+    status = data.get("status")
+
+    # genuinely no walking route between these points
+    if status in ("ZERO_RESULTS", "NOT_FOUND"):
         return []
+    if status != "OK":
+        raise GoogleAPIError("directions", status, data.get("error_message"))
 
     return data["routes"]
 
 
+def _directions_key(params):
+    return "|".join(params.get(k, "") for k in ("origin", "destination", "waypoints"))
+
+
+def _cached_directions(key):
+    # callers annotate routes in place; never hand out the cached objects
+    cached = directions_cache.get(key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def _remember_directions(key, routes):
+    directions_cache.set(key, routes)
+    return copy.deepcopy(routes)
+
+
+async def _acached_directions(key):
+    cached = await directions_cache.aget(key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+async def _aremember_directions(key, routes):
+    await directions_cache.aset(key, routes)
+    return copy.deepcopy(routes)
+
+
+def _local_routes(origin_latlng, dest_latlng, waypoint=None):
+    graph = get_walk_graph(WALK_GRAPH_PATH)
+    return graph.routes(origin_latlng, dest_latlng, waypoint, k=LOCAL_ALTERNATIVES)
+
+
+@timed("fetch_routes")
+def fetch_routes(origin_latlng, dest_latlng, waypoint=None):
+    if ROUTE_ENGINE == "local":
+        return _local_routes(origin_latlng, dest_latlng, waypoint)
+
+    params = _directions_params(origin_latlng, dest_latlng, waypoint)
+    key = _directions_key(params)
+    cached = _cached_directions(key)
+    if cached is not None:
+        return cached
+
+    data = _google_get(DIRECTIONS_URL, params)
+    return _remember_directions(key, _parse_directions(data))
+
+
+@timed("fetch_routes")
+async def afetch_routes(origin_latlng, dest_latlng, waypoint=None):
+    if ROUTE_ENGINE == "local":
+        # CPU-bound search; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _local_routes, origin_latlng, dest_latlng, waypoint)
+
+    params = _directions_params(origin_latlng, dest_latlng, waypoint)
+    key = _directions_key(params)
+    cached = await _acached_directions(key)
+    if cached is not None:
+        return cached
+
+    data = await _agoogle_get(DIRECTIONS_URL, params)
+    return await _aremember_directions(key, _parse_directions(data))
+
+
 # -------------------------
 # GENERATE MANY ROUTES
 # -------------------------
-def get_many_routes(origin: str, destination: str, num_variations=6):
+def get_many_routes(origin: str, destination: str, num_variations=6, dedup_tolerance_m=None, locations=None):
     """
     Generates multiple candidate routes by shifting waypoints.
+    Pass a dict as `locations` to receive the geocoded origin/destination;
+    ends already in it (from an earlier attempt) are not geocoded again.
     """
 
-    origin_loc = geocode_address(origin)
-    dest_loc = geocode_address(destination)
+    locations = {} if locations is None else locations
+    if "origin" not in locations or "destination" not in locations:
+        # geocode both ends at once
+        origin_loc, dest_loc = _executor.map(geocode_address, [origin, destination])
+        locations.update(origin=origin_loc, destination=dest_loc)
+    origin_loc, dest_loc = locations["origin"], locations["destination"]
+
+    # all calls run concurrently; order is preserved (direct call first)
+    all_routes = fetch_routes_many(_many_routes_calls(origin_loc, dest_loc, num_variations))
+
+    # drop near-identical paths before anything pays to enrich them
+    return deduplicate_routes(all_routes, tolerance_m=dedup_tolerance_m)
+
+
+async def aget_many_routes(origin: str, destination: str, num_variations=6, dedup_tolerance_m=None, locations=None):
+    """Async get_many_routes."""
+    locations = {} if locations is None else locations
+    if "origin" not in locations or "destination" not in locations:
+        origin_loc, dest_loc = await asyncio.gather(
+            ageocode_address(origin),
+            ageocode_address(destination),
+        )
+        locations.update(origin=origin_loc, destination=dest_loc)
+    origin_loc, dest_loc = locations["origin"], locations["destination"]
+
+    all_routes = await afetch_routes_many(_many_routes_calls(origin_loc, dest_loc, num_variations))
+
+    return await _adeduplicate_routes(all_routes, dedup_tolerance_m)
+
+
+def _many_routes_calls(origin_loc, dest_loc, num_variations):
+    """fetch_routes arguments for the direct route plus shifted-waypoint variations."""
 
     # Compute midpoint
     mid_lat = (origin_loc["lat"] + dest_loc["lat"]) / 2
@@ -197,12 +1189,8 @@ def get_many_routes(origin: str, destination: str, num_variations=6):
     (-0.01, 0.003),
 ]
 
-    all_routes = []
-
     # 1️⃣ Direct call (baseline routes)
-    all_routes.extend(fetch_routes(origin_loc, dest_loc))
-
-    # all_routes[:] = deduplicate_routes(all_routes)
+    calls = [(origin_loc, dest_loc, None)]
 
     # 2️⃣ Calls with shifted waypoints
     for dlat, dlng in offsets[:num_variations]:
@@ -210,48 +1198,199 @@ def get_many_routes(origin: str, destination: str, num_variations=6):
             "lat": mid_lat + dlat,
             "lng": mid_lng + dlng,
         }
-        all_routes.extend(fetch_routes(origin_loc, dest_loc, waypoint))
-
-    # 3️⃣ Simplify results
-    summaries = []
-
-    return all_routes
-
-def get_routes_by_duration(origin: str, minutes: int, num_variations=8):
+        calls.append((origin_loc, dest_loc, waypoint))
+
+    return calls
+
+def get_routes_by_duration(
+    origin: str,
+    minutes: int,
+    num_variations=8,
+    dedup_tolerance_m=None,
+    locations=None,
+    tolerance=None,
+    min_candidates=None,
+):
     """
     Generate candidate walking routes that last ~X minutes
     by routing from origin to points on a circle boundary.
+    The radius is adapted per bearing (see _duration_search); routes
+    outside the duration tolerance are dropped before anything else runs.
+    `locations` works as in get_many_routes.
     """
 
-    origin_loc = geocode_address(origin)
+    locations = {} if locations is None else locations
+    if "origin" not in locations:
+        locations["origin"] = geocode_address(origin)
+    origin_loc = locations["origin"]
+
+    search = _duration_search(origin_loc, minutes, num_variations, tolerance, min_candidates)
+    calls = next(search)
+    while True:
+        results = list(_executor.map(lambda args: _capture(fetch_routes, *args), calls))
+        try:
+            calls = search.send(results)
+        except StopIteration as done:
+            routes = done.value
+            break
+
+    return deduplicate_routes(routes, tolerance_m=dedup_tolerance_m)
+
+
+async def aget_routes_by_duration(
+    origin: str,
+    minutes: int,
+    num_variations=8,
+    dedup_tolerance_m=None,
+    locations=None,
+    tolerance=None,
+    min_candidates=None,
+):
+    """Async get_routes_by_duration."""
+    locations = {} if locations is None else locations
+    if "origin" not in locations:
+        locations["origin"] = await ageocode_address(origin)
+    origin_loc = locations["origin"]
+
+    search = _duration_search(origin_loc, minutes, num_variations, tolerance, min_candidates)
+    calls = next(search)
+    while True:
+        results = await _gather_bounded(
+            (afetch_routes(*args) for args in calls), return_exceptions=True
+        )
+        try:
+            calls = search.send(results)
+        except StopIteration as done:
+            routes = done.value
+            break
+
+    return await _adeduplicate_routes(routes, dedup_tolerance_m)
+
+
+def _spread_order(n):
+    """0..n-1 ordered so every prefix is spread around the circle: 0, n/2, n/4, 3n/4, ..."""
+    order = []
+    parts = 1
+    while len(order) < n:
+        for k in range(parts):
+            i = k * n // parts
+            if i not in order:
+                order.append(i)
+        parts *= 2
+    return order
+
+
+def _boundary_point(origin_loc, bearing_deg, radius_m):
+    rad = math.radians(bearing_deg)
+    lat_radius = radius_m / 111_000
+    lng_radius = radius_m / (111_000 * math.cos(math.radians(origin_loc["lat"])))
+
+    return {
+        "lat": origin_loc["lat"] + lat_radius * math.sin(rad),
+        "lng": origin_loc["lng"] + lng_radius * math.cos(rad),
+    }
 
-    # Approx walking radius
-    radius_m = minutes * 80  # 80m per minute walking speed
 
-    # Convert meters → degrees latitude
-    lat_radius = radius_m / 111_000
+def _route_duration_s(route):
+    return route["legs"][0]["duration"]["value"]
 
-    # Longitude depends on latitude
-    lng_radius = radius_m / (111_000 * math.cos(math.radians(origin_loc["lat"])))
 
-    boundary_points = []
+def _next_radius(observed, target_s, m_per_s):
+    """
+    Radius to try next on one bearing, from its (radius, duration) history.
+    No history: the learned metres-per-second guess. One point: scale it
+    (a secant through the origin). More: secant on the last two points,
+    falling back to bisection when that leaves the known bracket.
+    """
+    if not observed:
+        return target_s * m_per_s
 
-    for i in range(num_variations):
-        angle = (360 / num_variations) * i
-        rad = math.radians(angle)
+    r2, d2 = observed[-1]
+    if len(observed) == 1 or d2 == observed[-2][1]:
+        guess = r2 * target_s / max(d2, 1)
+    else:
+        r1, d1 = observed[-2]
+        guess = r2 + (target_s - d2) * (r2 - r1) / (d2 - d1)
 
-        lat = origin_loc["lat"] + lat_radius * math.sin(rad)
-        lng = origin_loc["lng"] + lng_radius * math.cos(rad)
+    below = [r for r, d in observed if d < target_s]
+    above = [r for r, d in observed if d > target_s]
+    if below and above:
+        low, high = max(below), min(above)
+        if not low < guess < high:
+            guess = (low + high) / 2
 
-        boundary_points.append({"lat": lat, "lng": lng})
+    return min(max(guess, 0.25 * r2, 50), 4 * r2)
 
-    routes = []
 
-    for pt in boundary_points:
-        routes.extend(fetch_routes(origin_loc, pt))
+def _duration_search(origin_loc, minutes, num_variations, tolerance=None, min_candidates=None):
+    """
+    Generator driving the by-duration search. Yields batches of
+    fetch_routes arguments, receives their results (route lists or
+    exceptions) and finally returns the routes within tolerance.
+
+    Round one routes along min_candidates well-spread bearings. Each later
+    round retries the bearings that missed the tolerance with an adjusted
+    radius, plus fresh bearings for any remaining shortfall.
+    """
+    tolerance = DURATION_TOLERANCE if tolerance is None else tolerance
+    wanted = min(num_variations, min_candidates or DURATION_CANDIDATES)
+    target_s = minutes * 60
+
+    untried = [360 / num_variations * i for i in _spread_order(num_variations)]
+    history = {}   # bearing -> [(radius_m, closest duration_s)]
+    accepted = {}  # bearing -> routes within tolerance
+    misses = []    # (relative error, route), used only if nothing fits
+    errors = []
+    m_per_s = WALK_M_PER_MIN / 60
+
+    for _ in range(DURATION_MAX_ROUNDS):
+        shortfall = wanted - len(accepted)
+        if shortfall <= 0:
+            break
+
+        retry = [b for b in history if b not in accepted]
+        fresh = untried[:max(0, shortfall - len(retry))]
+        untried = untried[len(fresh):]
+
+        batch = [(b, _next_radius(history.get(b), target_s, m_per_s)) for b in retry + fresh]
+        if not batch:
+            break
+
+        results = yield [(origin_loc, _boundary_point(origin_loc, b, r), None) for b, r in batch]
+
+        for (bearing, radius), routes in zip(batch, results):
+            if isinstance(routes, Exception):
+                errors.append(routes)
+                continue
+
+            for route in routes:
+                error = abs(_route_duration_s(route) - target_s) / target_s
+                if error <= tolerance:
+                    accepted.setdefault(bearing, []).append(route)
+                else:
+                    misses.append((error, route))
+
+            if routes:
+                closest = min(routes, key=lambda r: abs(_route_duration_s(r) - target_s))
+                history.setdefault(bearing, []).append((radius, _route_duration_s(closest)))
+
+        # straight-line metres per walking second seen so far, for new bearings
+        ratios = sorted(r / d for points in history.values() for r, d in points if d > 0)
+        if ratios:
+            m_per_s = ratios[len(ratios) // 2]
+
+    if errors and not history:
+        raise errors[0]
+
+    routes = [route for bearing_routes in accepted.values() for route in bearing_routes]
+    if not routes:
+        # nothing within tolerance: keep the nearest misses so the walk still works
+        logger.info("No route within %.0f%% of %s minutes; using nearest", tolerance * 100, minutes)
+        routes = [route for _, route in sorted(misses, key=lambda m: m[0])[:wanted]]
 
     return routes
 
+
 def pick_best_places(places, top_n=5):
     """
     Rank places by distance and return top N.
@@ -278,62 +1417,81 @@ def summarize_place(place):
         "address": place.get("vicinity"),
     }
 
-def enrich_route(route, queries):
-    coords = decode_route_polyline(route)
-    sampled_points = sample_route_points(coords, step=20)
+def enrich_route(route, queries, geometry=None):
+    geometry = geometry or RouteGeometry.from_route(route, SAMPLE_SPACING_M)
+
+    radius = _sample_search_radius(geometry)
+
+    searches = [
+        (q, search_places(lat, lng, q, radius=radius))
+        for lat, lng in geometry.samples()
+        for q in queries
+    ]
+
+    route["enrichment"] = _build_enrichment(searches, queries)
+
+    return route
+
 
+async def aenrich_route(route, queries, geometry=None):
+    geometry = geometry or RouteGeometry.from_route(route, SAMPLE_SPACING_M)
+
+    radius = _sample_search_radius(geometry)
+
+    keys = [(lat, lng, q) for lat, lng in geometry.samples() for q in queries]
+    results = await _gather_bounded(
+        asearch_places(lat, lng, q, radius=radius) for lat, lng, q in keys
+    )
+
+    route["enrichment"] = _build_enrichment(
+        [(q, places) for (_, _, q), places in zip(keys, results)],
+        queries,
+    )
+
+    return route
+
+
+def _build_enrichment(searches, queries):
+    """Dedupe (query, places) search results in sample order and keep the top POIs."""
     enrichment = {q: [] for q in queries}
     seen = set()
 
-    for lat, lng in sampled_points:
-        for q in queries:
-            places = search_places(lat, lng, q, radius=50)
-
-            for p in places:
-                if p['place_id'] not in seen:
-                    seen.add(p['place_id'])
-                    enrichment[q].append(summarize_place(p))
+    for q, places in searches:
+        for p in places:
+            if p['place_id'] not in seen:
+                seen.add(p['place_id'])
+                enrichment[q].append(summarize_place(p))
 
     # reorder places
     for q in queries:
         enrichment[q] = pick_best_places(enrichment[q], top_n=5)
-    
-    route["enrichment"] = enrichment
-
-    return route
 
-def enrich_with_crowd(route):
-    coords = decode_route_polyline(route)
-    sampled = sample_route_points(coords, step=20)
+    return enrichment
 
-    densities = []
+def enrich_with_crowd(route, geometry=None):
+    geometry = geometry or RouteGeometry.from_route(route, SAMPLE_SPACING_M)
 
-    for lat, lng in sampled:
-        densities.append(get_crowd_density(lat, lng))
+    densities = get_crowd_density_batch(*geometry.sample_arrays())
 
-    if densities:
+    if densities.size:
         route["crowd"] = {
-            "avg_density": round(sum(densities) / len(densities), 2),
-            "max_density": max(densities),
+            "avg_density": round(float(densities.mean()), 2),
+            "max_density": float(densities.max()),
         }
     else:
         route["crowd"] = {"avg_density": 0, "max_density": 0}
 
     return route
 
-def enrich_with_safety(route):
-    coords = decode_route_polyline(route)
-    sampled = sample_route_points(coords, step=20)
+def enrich_with_safety(route, geometry=None):
+    geometry = geometry or RouteGeometry.from_route(route, SAMPLE_SPACING_M)
 
-    risks = []
+    risks = get_crime_risk_batch(*geometry.sample_arrays())
 
-    for lat, lng in sampled:
-        risks.append(get_crime_risk(lat, lng))
-
-    if risks:
+    if risks.size:
         route["safety"] = {
-            "avg_risk": round(sum(risks) / len(risks), 2),
-            "max_risk": max(risks),
+            "avg_risk": round(float(risks.mean()), 2),
+            "max_risk": float(risks.max()),
         }
     else:
         route["safety"] = {"avg_risk": 0, "max_risk": 0}
@@ -341,6 +1499,80 @@ def enrich_with_safety(route):
     return route
 
 
+# -------------------------
+# ENRICHMENT PIPELINE
+# -------------------------
+# Each stage is (name, stage, async_stage). Stages are called as
+# stage(route, geometry, queries) and write their results onto the route;
+# async_stage is an optional awaitable variant used by the async path.
+# Append to this list to plug in new signals.
+ENRICHMENT_STAGES = [
+    (
+        "places",
+        lambda route, geometry, queries: enrich_route(route, queries, geometry),
+        lambda route, geometry, queries: aenrich_route(route, queries, geometry),
+    ),
+    ("crowd", lambda route, geometry, queries: enrich_with_crowd(route, geometry), None),
+    ("safety", lambda route, geometry, queries: enrich_with_safety(route, geometry), None),
+]
+
+
+def enrich_full(route, queries, stages=None):
+    """
+    Decode + sample the route once, then run every enrichment stage
+    over the same RouteGeometry. Each stage is timed as "enrich.<name>".
+    """
+    geometry = RouteGeometry.from_route(route, SAMPLE_SPACING_M)
+
+    for name, stage, _ in stages or ENRICHMENT_STAGES:
+        with stage_timer(f"enrich.{name}"):
+            stage(route, geometry, queries)
+
+    return route
+
+
+async def aenrich_full(route, queries, stages=None):
+    """Async enrich_full; stages without an async variant run inline."""
+    geometry = RouteGeometry.from_route(route, SAMPLE_SPACING_M)
+
+    for name, stage, async_stage in stages or ENRICHMENT_STAGES:
+        with stage_timer(f"enrich.{name}"):
+            if async_stage is not None:
+                await async_stage(route, geometry, queries)
+            else:
+                stage(route, geometry, queries)
+
+    return route
+
+
+def _uses_places(stages):
+    return any(name == "places" for name, _, _ in stages or ENRICHMENT_STAGES)
+
+
+def prefetch_places(routes, queries, stages=None):
+    """Plan Places coverage for all candidate routes of a request at once."""
+    if not PLACES_PLAN_LEVELS or not _uses_places(stages):
+        return
+    with stage_timer("plan_places"):
+        plan_places([RouteGeometry.from_route(r, SAMPLE_SPACING_M) for r in routes], queries)
+
+
+async def aprefetch_places(routes, queries, stages=None):
+    """Async prefetch_places."""
+    if not PLACES_PLAN_LEVELS or not _uses_places(stages):
+        return
+    with stage_timer("plan_places"):
+        await aplan_places([RouteGeometry.from_route(r, SAMPLE_SPACING_M) for r in routes], queries)
+
+
+def enrich_routes(routes, queries, stages=None):
+    prefetch_places(routes, queries, stages)
+    return [enrich_full(r, queries, stages) for r in routes]
+
+
+async def aenrich_routes(routes, queries, stages=None):
+    await aprefetch_places(routes, queries, stages)
+    return list(await _gather_bounded(aenrich_full(r, queries, stages) for r in routes))
 
 
 # -------------------------
@@ -352,7 +1584,6 @@ if __name__ == "__main__":
         "Union Station, Chicago",
         num_variations=6
     )
-    # routes_unique = deduplicate_routes(routes)
     print(f"\nGenerated {len(routes)} candidate routes\n")
 
 
@@ -360,9 +1591,7 @@ if __name__ == "__main__":
     #     print(f"Route {i}: {r}")
     
     for r in routes:
-        enriched = enrich_route(r, queries=["cafe"])
-        enriched = enrich_with_crowd(enriched)
-        enriched = enrich_with_safety(enriched)
+        enriched = enrich_full(r, queries=["cafe"])
         print("\n\n=================================\n\n")
         print(f"ENRICHMENT for route: {enriched['summary']}")
         for k, v in enriched["enrichment"].items():
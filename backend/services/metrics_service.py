@@ -0,0 +1,241 @@
+import functools
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Log level of the "loopwalk" loggers, and the share of hot-path debug
+# lines (one per request) that are actually written.
+LOG_LEVEL = os.getenv("LOOPWALK_LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.getenv("LOOPWALK_LOG_SAMPLE_RATE", "0.01"))
+
+# Latency buckets in seconds: cache hits sit in the first few, Google and
+# LLM calls in the middle, whole pipelines at the top.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+logging.getLogger("loopwalk").setLevel(LOG_LEVEL)
+
+
+def get_logger(name):
+    return logging.getLogger(f"loopwalk.{name}")
+
+
+def log_sampled(logger, level, msg, *args, rate=None):
+    """Log only a `rate` fraction (default LOOPWALK_LOG_SAMPLE_RATE) of calls."""
+    rate = LOG_SAMPLE_RATE if rate is None else rate
+    if logger.isEnabledFor(level) and random.random() < rate:
+        logger.log(level, msg, *args)
+
+
+# -------------------------
+# METRICS
+# -------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter keyed by label values, in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+
+        for key, value in values:
+            yield f"{self.name}{_format_labels(zip(self.labelnames, key))} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def totals(self):
+        """{label values: (count, sum)} for every series."""
+        with self._lock:
+            return {k: (sum(v[0]), v[1]) for k, v in self._series.items()}
+
+    def render(self):
+        with self._lock:
+            series = sorted((k, list(v[0]), v[1]) for k, v in self._series.items())
+
+        for key, counts, total in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {round(total, 6)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+STAGE_SECONDS = register(Histogram(
+    "loopwalk_stage_duration_seconds",
+    "Wall time of one pipeline stage call.",
+    ("stage",),
+))
+STAGE_CALLS = register(Counter(
+    "loopwalk_stage_calls_total",
+    "Pipeline stage calls by outcome.",
+    ("stage", "outcome"),
+))
+UPSTREAM_REQUESTS = register(Counter(
+    "loopwalk_upstream_requests_total",
+    "HTTP requests sent to external APIs (cache misses only).",
+    ("endpoint",),
+))
+UPSTREAM_ERRORS = register(Counter(
+    "loopwalk_upstream_errors_total",
+    "Retryable external API failures (before retry), by status.",
+    ("endpoint", "status"),
+))
+CACHE_LOOKUPS = register(Counter(
+    "loopwalk_cache_lookups_total",
+    "Cache lookups by namespace and the tier that answered them (or miss).",
+    ("namespace", "tier"),
+))
+RESULT_CACHE_REQUESTS = register(Counter(
+    "loopwalk_result_cache_requests_total",
+    "Route requests by how the result cache served them: hit, miss (ran the "
+    "pipeline) or coalesced (waited on an identical request in flight).",
+    ("outcome",),
+))
+LLM_PROMPT_TOKENS = register(Counter(
+    "loopwalk_llm_prompt_tokens_total",
+    "Prompt tokens sent to the chat model, by calling node.",
+    ("node",),
+))
+LLM_COMPLETION_TOKENS = register(Counter(
+    "loopwalk_llm_completion_tokens_total",
+    "Completion tokens returned by the chat model, by calling node.",
+    ("node",),
+))
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def record_llm_usage(node, message):
+    """Count the tokens of one chat model reply; returns (prompt, completion)."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt = usage.get("input_tokens", 0)
+    completion = usage.get("output_tokens", 0)
+
+    LLM_PROMPT_TOKENS.inc(prompt, node=node)
+    LLM_COMPLETION_TOKENS.inc(completion, node=node)
+    return prompt, completion
+
+
+def _record(stage, start, outcome):
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+    STAGE_CALLS.inc(stage=stage, outcome=outcome)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time the enclosed block as one call of `stage`."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        _record(stage, start, outcome)
+
+
+def timed(stage):
+    """Decorator: record latency and outcome of every call (sync or async)."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    _record(stage, start, outcome)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                _record(stage, start, outcome)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,310 @@
+"""
+Precomputed signal rasters (crowd density, crime risk) for O(1) lookups.
+
+Build once from a CSV of point events (e.g. crime incidents, pedestrian
+counter readings):
+
+    python -m backend.services.raster_service build incidents.csv data/safety_raster \\
+        --lat-col Latitude --lng-col Longitude --time-col Date \\
+        --time-format "%m/%d/%Y %I:%M:%S %p" --range 0.05 1.0
+
+Events are binned onto a metre grid, smoothed with a Gaussian kernel
+(kernel density) and stored per hour of the week as float32 layers in a
+.npy file. Lookups memory-map that file, so every worker process reads
+the same page-cached copy.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+_M_PER_DEG_LAT = 111_320
+HOURS_PER_WEEK = 168
+
+CELL_M = 50
+BANDWIDTH_M = 150
+# events spread over neighbouring hours too (circularly, Sunday -> Monday)
+BANDWIDTH_HOURS = 1.0
+# density quantile mapped to the top of the output range (outliers clip)
+NORMALIZE_QUANTILE = 0.995
+# Timezone the event timestamps are in, recorded in meta.json at build time;
+# lookups take "now" in it, not in the server's local time
+RASTER_TZ = os.getenv("LOOPWALK_RASTER_TZ", "America/Chicago")
+
+
+# -------------------------
+# BUILD
+# -------------------------
+def _parse_time(value, time_format=None, tz=RASTER_TZ):
+    """
+    Timestamp as local time in `tz`: offsets in the value are converted,
+    naive values are taken to already be `tz` wall time.
+    """
+    zone = tz if isinstance(tz, ZoneInfo) else ZoneInfo(tz)
+    moment = datetime.strptime(value, time_format) if time_format else datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=zone)
+    return moment.astimezone(zone)
+
+
+def hour_of_week(moment):
+    """0 = Monday 00:00-01:00 ... 167 = Sunday 23:00-24:00."""
+    return moment.weekday() * 24 + moment.hour
+
+
+def read_events(
+    path, lat_col="lat", lng_col="lng", time_col=None, weight_col=None, time_format=None, tz=RASTER_TZ
+):
+    """
+    (lats, lngs, hours or None, weights) arrays from an event CSV; bad rows
+    are skipped. Hours of week are in `tz` (see _parse_time).
+    """
+    zone = ZoneInfo(tz)
+    lats, lngs, hours, weights = [], [], [], []
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                lat = float(row[lat_col])
+                lng = float(row[lng_col])
+                hour = hour_of_week(_parse_time(row[time_col], time_format, zone)) if time_col else 0
+                weight = float(row[weight_col]) if weight_col else 1.0
+            except (KeyError, TypeError, ValueError):
+                continue
+            lats.append(lat)
+            lngs.append(lng)
+            hours.append(hour)
+            weights.append(weight)
+
+    return (
+        np.asarray(lats),
+        np.asarray(lngs),
+        np.asarray(hours, dtype=np.int64) if time_col else None,
+        np.asarray(weights),
+    )
+
+
+def _gaussian_kernel(sigma):
+    radius = max(1, math.ceil(3 * sigma))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _smooth(grid, sigma, axis, circular=False):
+    """Separable Gaussian smoothing of `grid` along one axis."""
+    if sigma <= 0 or grid.shape[axis] < 2:
+        return grid
+
+    kernel = _gaussian_kernel(sigma)
+    radius = len(kernel) // 2
+    out = np.zeros_like(grid)
+
+    for offset, w in zip(range(-radius, radius + 1), kernel):
+        if circular:
+            out += w * np.roll(grid, offset, axis=axis)
+            continue
+        # zero padding: mass shifted past the edge is dropped
+        src = [slice(None)] * grid.ndim
+        dst = [slice(None)] * grid.ndim
+        if offset >= 0:
+            src[axis], dst[axis] = slice(0, grid.shape[axis] - offset), slice(offset, None)
+        else:
+            src[axis], dst[axis] = slice(-offset, None), slice(0, grid.shape[axis] + offset)
+        out[tuple(dst)] += w * grid[tuple(src)]
+
+    return out
+
+
+def build_raster(
+    lats,
+    lngs,
+    out_dir,
+    hours=None,
+    weights=None,
+    cell_m=CELL_M,
+    bandwidth_m=BANDWIDTH_M,
+    bandwidth_hours=BANDWIDTH_HOURS,
+    value_range=(0.0, 1.0),
+    tz=RASTER_TZ,
+):
+    """
+    Kernel-density raster of point events. With `hours` (hour of week per
+    event, local time in `tz`) it has 168 layers, otherwise one. Densities
+    are scaled so the NORMALIZE_QUANTILE cell maps to value_range[1] and
+    empty cells to value_range[0].
+    """
+    ZoneInfo(tz)  # fail the build, not the first lookup, on a bad name
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    if not len(lats):
+        raise ValueError("no events to build a raster from")
+    weights = np.ones_like(lats) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    # grid in degrees, padded so kernels near the data edge are not cut off
+    mid_lat = (lats.min() + lats.max()) / 2
+    dlat = cell_m / _M_PER_DEG_LAT
+    dlng = dlat / math.cos(math.radians(mid_lat))
+    pad = math.ceil(3 * bandwidth_m / cell_m) + 1
+
+    lat0 = lats.min() - pad * dlat
+    lng0 = lngs.min() - pad * dlng
+    rows = int((lats.max() - lat0) / dlat) + pad + 2
+    cols = int((lngs.max() - lng0) / dlng) + pad + 2
+    layers = HOURS_PER_WEEK if hours is not None else 1
+
+    grid = np.zeros((layers, rows, cols), dtype=np.float64)
+    r = np.round((lats - lat0) / dlat).astype(np.int64)
+    c = np.round((lngs - lng0) / dlng).astype(np.int64)
+    layer = np.asarray(hours, dtype=np.int64) % HOURS_PER_WEEK if hours is not None else np.zeros_like(r)
+    np.add.at(grid, (layer, r, c), weights)
+
+    sigma_cells = bandwidth_m / cell_m
+    grid = _smooth(grid, sigma_cells, axis=1)
+    grid = _smooth(grid, sigma_cells, axis=2)
+    if layers > 1:
+        grid = _smooth(grid, bandwidth_hours, axis=0, circular=True)
+
+    top = np.quantile(grid[grid > 0], NORMALIZE_QUANTILE) if (grid > 0).any() else 1.0
+    low, high = value_range
+    values = (low + (high - low) * np.clip(grid / top, 0, 1)).astype(np.float32)
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "values.npy"), values)
+    meta = {
+        "lat0": lat0, "lng0": lng0, "dlat": dlat, "dlng": dlng,
+        "layers": layers, "rows": rows, "cols": cols,
+        "cell_m": cell_m, "bandwidth_m": bandwidth_m,
+        "low": low, "high": high, "events": int(len(lats)), "tz": tz,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return meta
+
+
+# -------------------------
+# LOOKUP
+# -------------------------
+class Raster:
+    """Memory-mapped (layers, rows, cols) grid with bilinear lookups."""
+
+    def __init__(self, values, meta):
+        self.values = values
+        self.meta = meta
+        self.lat0 = meta["lat0"]
+        self.lng0 = meta["lng0"]
+        self.dlat = meta["dlat"]
+        self.dlng = meta["dlng"]
+        self.low = meta["low"]
+        # rasters built before the tz was recorded use LOOPWALK_RASTER_TZ
+        self.tz = ZoneInfo(meta.get("tz") or RASTER_TZ)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(path, "values.npy"), mmap_mode="r"), meta)
+
+    def sample(self, lats, lngs, hour=None):
+        """
+        Interpolated values at each (lat, lng) for `hour` of the week (now in
+        the raster's timezone by default; ignored by single-layer rasters).
+        Points off the grid get the bottom of the range.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        layers, rows, cols = self.values.shape
+
+        if layers == 1:
+            layer = 0
+        else:
+            layer = (hour_of_week(datetime.now(self.tz)) if hour is None else hour) % layers
+
+        y = (lats - self.lat0) / self.dlat
+        x = (lngs - self.lng0) / self.dlng
+        inside = (y >= 0) & (y <= rows - 1) & (x >= 0) & (x <= cols - 1)
+
+        y = np.clip(y, 0, rows - 1)
+        x = np.clip(x, 0, cols - 1)
+        r0 = np.minimum(y.astype(np.int64), rows - 2) if rows > 1 else np.zeros_like(y, dtype=np.int64)
+        c0 = np.minimum(x.astype(np.int64), cols - 2) if cols > 1 else np.zeros_like(x, dtype=np.int64)
+        r1 = np.minimum(r0 + 1, rows - 1)
+        c1 = np.minimum(c0 + 1, cols - 1)
+        fy = y - r0
+        fx = x - c0
+
+        grid = self.values[layer]
+        value = (
+            grid[r0, c0] * (1 - fy) * (1 - fx)
+            + grid[r0, c1] * (1 - fy) * fx
+            + grid[r1, c0] * fy * (1 - fx)
+            + grid[r1, c1] * fy * fx
+        )
+
+        return np.where(inside, value, self.low)
+
+
+_rasters = {}
+_rasters_lock = threading.Lock()
+
+
+def get_raster(path):
+    """Process-wide Raster for `path`, memory-mapped on first use."""
+    raster = _rasters.get(path)
+    if raster is None:
+        with _rasters_lock:
+            raster = _rasters.get(path)
+            if raster is None:
+                raster = _rasters[path] = Raster.load(path)
+    return raster
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a signal raster from a CSV of point events.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build")
+    build.add_argument("events", help="CSV file of events")
+    build.add_argument("out_dir")
+    build.add_argument("--lat-col", default="lat")
+    build.add_argument("--lng-col", default="lng")
+    build.add_argument("--time-col", help="timestamp column; enables hour-of-week layers")
+    build.add_argument("--time-format", help="strptime format (default: ISO 8601)")
+    build.add_argument("--weight-col")
+    build.add_argument("--cell-m", type=float, default=CELL_M)
+    build.add_argument("--bandwidth-m", type=float, default=BANDWIDTH_M)
+    build.add_argument("--bandwidth-hours", type=float, default=BANDWIDTH_HOURS)
+    build.add_argument("--range", nargs=2, type=float, default=(0.0, 1.0), metavar=("LOW", "HIGH"))
+    build.add_argument("--tz", default=RASTER_TZ, help="IANA timezone of the raster; naive timestamps are taken to be in it")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    lats, lngs, hours, weights = read_events(
+        args.events, args.lat_col, args.lng_col, args.time_col, args.weight_col, args.time_format, args.tz
+    )
+    meta = build_raster(
+        lats, lngs, args.out_dir,
+        hours=hours,
+        weights=weights,
+        cell_m=args.cell_m,
+        bandwidth_m=args.bandwidth_m,
+        bandwidth_hours=args.bandwidth_hours,
+        value_range=tuple(args.range),
+        tz=args.tz,
+    )
+    print(
+        f"{meta['events']} events -> {meta['layers']}x{meta['rows']}x{meta['cols']} raster "
+        f"in {args.out_dir} ({time.perf_counter() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# Statuses (Google "status" field, or HTTP/transport failures mapped to a
+# pseudo-status) that are worth retrying and count against the breaker.
+RETRYABLE_STATUSES = {
+    "OVER_QUERY_LIMIT", "UNKNOWN_ERROR", "HTTP_429", "HTTP_5XX", "TRANSPORT_ERROR", "INVALID_RESPONSE",
+}
+
+MAX_RETRIES = int(os.getenv("LOOPWALK_GOOGLE_MAX_RETRIES", "3"))
+BACKOFF_BASE_S = float(os.getenv("LOOPWALK_GOOGLE_BACKOFF_BASE_S", "0.2"))
+BACKOFF_MAX_S = float(os.getenv("LOOPWALK_GOOGLE_BACKOFF_MAX_S", "5"))
+
+# Breaker opens after this many retryable failures in a row and lets one
+# probe request through after the cooldown.
+BREAKER_FAILURES = int(os.getenv("LOOPWALK_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_S = float(os.getenv("LOOPWALK_BREAKER_COOLDOWN_S", "30"))
+
+
+class GoogleAPIError(Exception):
+    """A Google Maps request failed (after retries, where retryable)."""
+
+    def __init__(self, endpoint: str, status: str, detail: str | None = None):
+        self.endpoint = endpoint
+        self.status = status
+        message = f"Google {endpoint} request failed: {status}"
+        super().__init__(f"{message} ({detail})" if detail else message)
+
+
+class CircuitOpenError(GoogleAPIError):
+    """Raised without calling Google while an endpoint's breaker is open."""
+
+    def __init__(self, endpoint: str):
+        super().__init__(endpoint, "CIRCUIT_OPEN")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+# -------------------------
+# TOKEN BUCKETS
+# -------------------------
+class TokenBucket:
+    """In-process token bucket: `rate` tokens per second, up to `burst`."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0, or the seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while (wait := self.try_acquire()) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        while (wait := self.try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket kept in a SQLite file, so every worker process on the host
+    draws from the same quota. Each acquire is one short write transaction.
+    """
+
+    def __init__(self, path: str, name: str, rate: float, burst: float | None = None):
+        super().__init__(rate, burst)
+        self.path = path
+        self.name = name
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, self.burst, time.time()),
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+
+            # wall clock: monotonic clocks are not comparable across processes
+            now = time.time()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            conn.execute(
+                "UPDATE rate_limits SET tokens = ?, updated = ? WHERE name = ?",
+                (tokens, now, self.name),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return wait
+
+    async def aacquire(self):
+        # BEGIN IMMEDIATE can wait up to 5 s on other workers; keep it off the loop
+        while (wait := await asyncio.to_thread(self.try_acquire)) > 0:
+            await asyncio.sleep(wait)
+
+
+# -------------------------
+# CIRCUIT BREAKER
+# -------------------------
+class CircuitBreaker:
+    """
+    Closed: requests flow. After `failures` consecutive retryable failures
+    it opens and rejects requests for `cooldown_s`; then one probe request
+    is let through, which closes it again on success or re-opens it.
+    """
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, cooldown_s: float = BREAKER_COOLDOWN_S):
+        self.name = name
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self._failed = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown_s:
+                raise CircuitOpenError(self.name)
+            self._probing = True
+
+    def release_probe(self):
+        """
+        The probe ended without an outcome (cancelled, or failed before a
+        response was judged): let the next caller probe instead.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """Returns True if this failure opened the breaker."""
+        with self._lock:
+            self._failed += 1
+            was_open = self._opened_at is not None
+            if self._probing or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+                self._probing = False
+            return not was_open and self._opened_at is not None
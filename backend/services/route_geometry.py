@@ -0,0 +1,226 @@
+import math
+import os
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+# Hard cap on sample points per route; longer routes get wider spacing
+MAX_SAMPLES = int(os.getenv("LOOPWALK_MAX_SAMPLES_PER_ROUTE", "64"))
+
+# Number of evenly spaced points used when comparing route shapes
+SHAPE_POINTS = 32
+
+_M_PER_DEG_LAT = 111_320
+_EARTH_RADIUS_M = 6371000
+
+
+def coverage_spacing(radius_m: float) -> float:
+    """
+    Sample spacing at which search circles of `radius_m` overlap enough to
+    cover a corridor of half-width radius/sqrt(2) along the route with no gaps.
+    """
+    return radius_m * math.sqrt(2)
+
+
+def coverage_radius(spacing_m: float) -> float:
+    """Inverse of coverage_spacing: search radius needed for `spacing_m`."""
+    return spacing_m / math.sqrt(2)
+
+
+# Places search radius around each route sample point. Samples are spaced
+# so these circles leave no gaps along the route; routes that hit
+# MAX_SAMPLES search wider instead (see RouteGeometry.search_radius).
+PLACES_SEARCH_RADIUS_M = float(os.getenv("LOOPWALK_PLACES_SEARCH_RADIUS_M", "50"))
+SAMPLE_SPACING_M = coverage_spacing(PLACES_SEARCH_RADIUS_M)
+
+
+def cumulative_distance_m(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Distance along the polyline at every vertex (vectorized haversine_m)."""
+    if lats.size == 0:
+        return np.empty(0)
+
+    phi = np.radians(lats)
+    dphi = np.diff(phi)
+    dlambda = np.radians(np.diff(lngs))
+
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlambda / 2) ** 2
+    seg = 2 * _EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return np.concatenate(([0.0], np.cumsum(seg)))
+
+
+def resample_by_distance(lats: np.ndarray, lngs: np.ndarray, spacing_m: float, max_points: int):
+    """
+    Points every `spacing_m` metres along the polyline, start and end
+    included, never more than `max_points` (spacing widens instead).
+    Returns (sample_lats, sample_lngs, actual_spacing_m).
+    """
+    if lats.size < 2:
+        return lats.copy(), lngs.copy(), 0.0
+
+    dist = cumulative_distance_m(lats, lngs)
+    total = float(dist[-1])
+    if total == 0:
+        return lats[:1].copy(), lngs[:1].copy(), 0.0
+
+    n = min(max(2, math.ceil(total / spacing_m) + 1), max(2, max_points))
+    targets = np.linspace(0.0, total, n)
+
+    return np.interp(targets, dist, lats), np.interp(targets, dist, lngs), total / (n - 1)
+
+
+def decode_polyline_arrays(encoded: str):
+    """
+    Decode a Google encoded polyline straight into two float arrays
+    (lats, lngs), skipping the intermediate list of tuples.
+    """
+    lats = array("d")
+    lngs = array("d")
+
+    index = 0
+    lat = 0
+    lng = 0
+    length = len(encoded)
+
+    while index < length:
+        for is_lng in (False, True):
+            shift = 0
+            result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+
+            delta = ~(result >> 1) if result & 1 else result >> 1
+            if is_lng:
+                lng += delta
+            else:
+                lat += delta
+
+        lats.append(lat / 1e5)
+        lngs.append(lng / 1e5)
+
+    return lats, lngs
+
+
+@lru_cache(maxsize=512)
+def _decode_cached(encoded: str):
+    # routes are decoded for dedup and again for enrichment; share the work
+    return decode_polyline_arrays(encoded)
+
+
+class RouteGeometry:
+    """
+    Decoded overview polyline and sample points for one route.
+    Built once per route and handed to every enrichment stage, so the
+    polyline is decoded and sampled a single time.
+
+    Samples are spaced by walking distance (not polyline vertices), so
+    their number depends on route length, capped at `max_samples`.
+    """
+
+    __slots__ = ("lats", "lngs", "sample_lats", "sample_lngs", "sample_spacing_m")
+
+    def __init__(
+        self,
+        lats: array,
+        lngs: array,
+        spacing_m: float = SAMPLE_SPACING_M,
+        max_samples: int = MAX_SAMPLES,
+    ):
+        self.lats = lats
+        self.lngs = lngs
+        self.sample_lats, self.sample_lngs, self.sample_spacing_m = resample_by_distance(
+            np.frombuffer(lats, dtype=np.float64),
+            np.frombuffer(lngs, dtype=np.float64),
+            spacing_m,
+            max_samples,
+        )
+
+    @classmethod
+    def from_route(cls, route, spacing_m: float = SAMPLE_SPACING_M, max_samples: int = MAX_SAMPLES):
+        encoded = route.get("overview_polyline", {}).get("points", "")
+        lats, lngs = _decode_cached(encoded)
+        return cls(lats, lngs, spacing_m=spacing_m, max_samples=max_samples)
+
+    def __len__(self):
+        return len(self.lats)
+
+    @property
+    def num_samples(self):
+        return len(self.sample_lats)
+
+    def samples(self):
+        """Iterate sampled (lat, lng) pairs."""
+        return zip(self.sample_lats.tolist(), self.sample_lngs.tolist())
+
+    def sample_arrays(self):
+        """Sampled lats/lngs as NumPy arrays."""
+        return self.sample_lats, self.sample_lngs
+
+    def search_radius(self, min_radius_m: float, max_radius_m: float | None = None) -> float:
+        """
+        Search radius that covers the route gap-free at this sample spacing,
+        at least `min_radius_m` and never more than `max_radius_m`.
+        """
+        radius = max(min_radius_m, coverage_radius(self.sample_spacing_m))
+        return radius if max_radius_m is None else min(radius, max_radius_m)
+
+    def shape(self, n: int = SHAPE_POINTS, ref_lat: float | None = None):
+        """
+        n points evenly spaced by distance along the full polyline, projected
+        to local x/y metres (equirectangular around `ref_lat`). Returns an
+        (n, 2) array, or an empty one for a degenerate polyline.
+        """
+        lats = np.frombuffer(self.lats, dtype=np.float64)
+        lngs = np.frombuffer(self.lngs, dtype=np.float64)
+        if lats.size == 0:
+            return np.empty((0, 2))
+
+        if ref_lat is None:
+            ref_lat = float(lats[0])
+
+        x = lngs * _M_PER_DEG_LAT * math.cos(math.radians(ref_lat))
+        y = lats * _M_PER_DEG_LAT
+
+        seg = np.hypot(np.diff(x), np.diff(y))
+        dist = np.concatenate(([0.0], np.cumsum(seg)))
+        targets = np.linspace(0.0, dist[-1], n)
+
+        return np.column_stack((np.interp(targets, dist, x), np.interp(targets, dist, y)))
+
+
+def hausdorff_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Symmetric Hausdorff distance between two (n, 2) point sets."""
+    d = np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+    return float(max(d.min(axis=1).max(), d.min(axis=0).max()))
+
+
+def frechet_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Discrete Fréchet distance between two (n, 2) polylines."""
+    d = np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+    n, m = d.shape
+
+    ca = np.empty_like(d)
+    ca[0] = np.maximum.accumulate(d[0])
+    for i in range(1, n):
+        ca[i, 0] = max(ca[i - 1, 0], d[i, 0])
+        prev = ca[i - 1]
+        row = ca[i]
+        di = d[i]
+        for j in range(1, m):
+            row[j] = max(di[j], min(prev[j], prev[j - 1], row[j - 1]))
+
+    return float(ca[-1, -1])
+
+
+def route_shape_distance(a: np.ndarray, b: np.ndarray, metric: str = "frechet") -> float:
+    if metric == "hausdorff":
+        return hausdorff_distance(a, b)
+    if metric == "frechet":
+        return frechet_distance(a, b)
+    raise ValueError(f"Unknown route shape metric: {metric}")
@@ -1,6 +1,29 @@
+import os
 import random
 import math
 
+import numpy as np
+
+from backend.services.raster_service import get_raster
+
+HOT_SPOT_LAT = 41.879
+HOT_SPOT_LNG = -87.630
+
+# Precomputed raster built by `python -m backend.services.raster_service
+# build`; when set it replaces the mock below
+SAFETY_RASTER_PATH = os.getenv("LOOPWALK_SAFETY_RASTER_PATH")
+
+# Set LOOPWALK_SIGNAL_SEED for reproducible batch noise
+_rng = np.random.default_rng(
+    int(os.environ["LOOPWALK_SIGNAL_SEED"]) if os.getenv("LOOPWALK_SIGNAL_SEED") else None
+)
+
+
+def seed(value: int | None):
+    """Reseed the generator used by get_crime_risk_batch."""
+    global _rng
+    _rng = np.random.default_rng(value)
+
 
 def get_crime_risk(lat: float, lng: float) -> float:
     """
@@ -9,8 +32,8 @@ def get_crime_risk(lat: float, lng: float) -> float:
     """
 
     # pretend some areas are riskier
-    hot_spot_lat = 41.879
-    hot_spot_lng = -87.630
+    hot_spot_lat = HOT_SPOT_LAT
+    hot_spot_lng = HOT_SPOT_LNG
 
     dist = math.sqrt((lat - hot_spot_lat) ** 2 + (lng - hot_spot_lng) ** 2)
 
@@ -19,4 +42,26 @@ def get_crime_risk(lat: float, lng: float) -> float:
 
     noise = random.uniform(-0.1, 0.1)
 
-    return round(min(1.0, max(0.05, base_risk + noise)), 2)
\ No newline at end of file
+    return round(min(1.0, max(0.05, base_risk + noise)), 2)
+
+
+def get_crime_risk_batch(lats, lngs, rng: np.random.Generator | None = None, hour: int | None = None) -> np.ndarray:
+    """
+    Vectorized get_crime_risk over arrays of latitudes and longitudes.
+    Pass `rng` to control the noise term; defaults to the module generator.
+    With SAFETY_RASTER_PATH set, values come from the raster for hour-of-week `hour`
+    (default: now) instead.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+
+    if SAFETY_RASTER_PATH:
+        return np.round(get_raster(SAFETY_RASTER_PATH).sample(lats, lngs, hour), 2)
+
+    rng = rng or _rng
+
+    dist = np.hypot(lats - HOT_SPOT_LAT, lngs - HOT_SPOT_LNG)
+    base_risk = np.maximum(0.05, 0.9 - dist * 120)
+    noise = rng.uniform(-0.1, 0.1, size=lats.shape)
+
+    return np.round(np.clip(base_risk + noise, 0.05, 1.0), 2)
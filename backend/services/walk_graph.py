@@ -0,0 +1,443 @@
+"""
+Local pedestrian routing over a street graph built from an OSM extract.
+
+Build once (OSM XML; convert .pbf first, e.g. `osmium cat city.osm.pbf -o city.osm`):
+
+    python -m backend.services.walk_graph build city.osm data/walk_graph
+
+The graph is a directory of .npy arrays in CSR form (node coordinates,
+edge targets, lengths, street-name ids) plus names.json. It is opened
+memory-mapped, so worker processes share one page-cached copy.
+"""
+import heapq
+import json
+import math
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+import numpy as np
+import polyline
+
+_M_PER_DEG_LAT = 111_320
+_EARTH_RADIUS_M = 6371000
+
+WALK_SPEED_M_S = 80 / 60  # same 80 m/min the duration search starts from
+
+# Ways a pedestrian can use (OSM highway=*), unless tagged foot=no / access=private
+WALKABLE_HIGHWAYS = {
+    "footway", "pedestrian", "path", "steps", "living_street", "residential",
+    "service", "unclassified", "tertiary", "tertiary_link", "secondary",
+    "secondary_link", "primary", "primary_link", "track", "cycleway",
+    "corridor", "crossing", "road",
+}
+_NO_FOOT = {"no", "private"}
+
+# Alternative routes: each found path makes its edges this much more
+# expensive for the next search; alternatives longer than MAX_STRETCH x
+# the shortest, or sharing more than MAX_OVERLAP of their length with an
+# earlier one, are dropped.
+PENALTY = float(os.getenv("LOOPWALK_LOCAL_PENALTY", "1.4"))
+MAX_STRETCH = float(os.getenv("LOOPWALK_LOCAL_MAX_STRETCH", "1.4"))
+MAX_OVERLAP = float(os.getenv("LOOPWALK_LOCAL_MAX_OVERLAP", "0.8"))
+# Stops farther than this from every graph node (e.g. outside the extract)
+# get no route rather than one starting at some distant node
+MAX_SNAP_M = float(os.getenv("LOOPWALK_LOCAL_MAX_SNAP_M", "200"))
+
+_ARRAYS = ("lat", "lng", "indptr", "indices", "length", "name_id")
+
+
+def _haversine_np(lat1, lng1, lat2, lng2):
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# -------------------------
+# BUILD
+# -------------------------
+def _walkable(tags):
+    return (
+        tags.get("highway") in WALKABLE_HIGHWAYS
+        and tags.get("foot") not in _NO_FOOT
+        and not (tags.get("access") in _NO_FOOT and tags.get("foot") is None)
+    )
+
+
+def parse_osm(path):
+    """Walkable ways of an OSM XML file: ({node_id: (lat, lng)}, [(node_ids, name)])."""
+    coords = {}
+    ways = []
+
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "node":
+            coords[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+            elem.clear()
+        elif elem.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+            if _walkable(tags):
+                refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                ways.append((refs, tags.get("name", "")))
+            elem.clear()
+
+    return coords, ways
+
+
+def build_graph(osm_path, out_dir):
+    """Convert an OSM XML extract into the on-disk CSR walking graph."""
+    coords, ways = parse_osm(osm_path)
+
+    node_index = {}
+    names = [""]
+    name_ids = {"": 0}
+    src, dst, name_of = [], [], []
+
+    for refs, name in ways:
+        refs = [r for r in refs if r in coords]
+        name_id = name_ids.setdefault(name, len(names))
+        if name_id == len(names):
+            names.append(name)
+
+        for a, b in zip(refs, refs[1:]):
+            if a == b:
+                continue
+            u = node_index.setdefault(a, len(node_index))
+            v = node_index.setdefault(b, len(node_index))
+            # pedestrians walk both ways regardless of oneway tags
+            src += [u, v]
+            dst += [v, u]
+            name_of += [name_id, name_id]
+
+    lat = np.empty(len(node_index))
+    lng = np.empty(len(node_index))
+    for osm_id, idx in node_index.items():
+        lat[idx], lng[idx] = coords[osm_id]
+
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int32)
+    order = np.argsort(src, kind="stable")
+    src, dst = src[order], dst[order]
+    name_id = np.asarray(name_of, dtype=np.int32)[order]
+
+    arrays = {
+        "lat": lat,
+        "lng": lng,
+        "indptr": np.concatenate(([0], np.cumsum(np.bincount(src, minlength=len(lat))))).astype(np.int64),
+        "indices": dst,
+        "length": _haversine_np(lat[src], lng[src], lat[dst], lng[dst]).astype(np.float32),
+        "name_id": name_id,
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for key, value in arrays.items():
+        np.save(os.path.join(out_dir, f"{key}.npy"), value)
+    with open(os.path.join(out_dir, "names.json"), "w") as f:
+        json.dump(names, f)
+
+    return len(lat), len(dst)
+
+
+# -------------------------
+# ROUTING
+# -------------------------
+class WalkGraph:
+    """Memory-mapped CSR walking graph with A* routing."""
+
+    def __init__(self, lat, lng, indptr, indices, length, name_id, names):
+        self.lat = lat
+        self.lng = lng
+        self.indptr = indptr
+        self.indices = indices
+        self.length = length
+        self.name_id = name_id
+        self.names = names
+
+        # scaling longitude by the most poleward latitude keeps the A*
+        # heuristic a lower bound on the true distance
+        max_abs_lat = float(np.abs(lat).max()) if len(lat) else 0.0
+        self._lng_scale = _M_PER_DEG_LAT * math.cos(math.radians(max_abs_lat))
+        self._build_grid()
+
+    def _build_grid(self):
+        """
+        Bucket nodes into a lat/lng grid of cells at least MAX_SNAP_M wide:
+        node ids sorted by cell key, so a run of cells in one grid row is one
+        slice of _grid_nodes.
+        """
+        self._cell_lat = MAX_SNAP_M / _M_PER_DEG_LAT
+        self._cell_lng = MAX_SNAP_M / self._lng_scale
+        self._lat0 = float(self.lat.min()) if len(self) else 0.0
+        self._lng0 = float(self.lng.min()) if len(self) else 0.0
+
+        rows = ((np.asarray(self.lat) - self._lat0) / self._cell_lat).astype(np.int64)
+        cols = ((np.asarray(self.lng) - self._lng0) / self._cell_lng).astype(np.int64)
+        self._grid_rows = int(rows.max()) + 1 if len(self) else 0
+        self._grid_cols = int(cols.max()) + 1 if len(self) else 0
+
+        keys = rows * self._grid_cols + cols
+        self._grid_nodes = np.argsort(keys, kind="stable")
+        self._grid_keys = keys[self._grid_nodes]
+
+    def _nodes_near(self, lat, lng, reach_m):
+        """Ids of the nodes in every grid cell within reach_m of (lat, lng)."""
+        row = math.floor((lat - self._lat0) / self._cell_lat)
+        col = math.floor((lng - self._lng0) / self._cell_lng)
+        row_ring = math.ceil(reach_m / MAX_SNAP_M)
+        # cells narrow (in metres) poleward of the graph's own latitudes
+        col_ring = math.ceil(reach_m / (self._cell_lng * _M_PER_DEG_LAT * math.cos(math.radians(lat))))
+
+        c_lo = max(col - col_ring, 0)
+        c_hi = min(col + col_ring, self._grid_cols - 1)
+        if c_lo > c_hi:
+            return self._grid_nodes[:0]
+
+        slices = []
+        for r in range(max(row - row_ring, 0), min(row + row_ring, self._grid_rows - 1) + 1):
+            lo, hi = np.searchsorted(
+                self._grid_keys, [r * self._grid_cols + c_lo, r * self._grid_cols + c_hi + 1]
+            )
+            slices.append(self._grid_nodes[lo:hi])
+        return np.concatenate(slices) if slices else self._grid_nodes[:0]
+
+    @classmethod
+    def load(cls, path):
+        arrays = {
+            key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r") for key in _ARRAYS
+        }
+        with open(os.path.join(path, "names.json")) as f:
+            names = json.load(f)
+        return cls(names=names, **arrays)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def nearest_node(self, lat, lng, max_distance_m=MAX_SNAP_M):
+        """Closest node to (lat, lng), or None if it is more than max_distance_m away."""
+        # only the grid cells that can hold a node within max_distance_m
+        nodes = self._nodes_near(lat, lng, max_distance_m)
+        if not len(nodes):
+            return None
+
+        dy = (self.lat[nodes] - lat) * _M_PER_DEG_LAT
+        dx = (self.lng[nodes] - lng) * _M_PER_DEG_LAT * math.cos(math.radians(lat))
+        d2 = dx * dx + dy * dy
+        best = int(np.argmin(d2))
+        return int(nodes[best]) if d2[best] <= max_distance_m * max_distance_m else None
+
+    def shortest_path(self, src, dst, penalties=None):
+        """
+        A* from node src to dst. `penalties` maps u * len(graph) + v to a
+        weight multiplier. Returns (nodes, edge indices) or (None, None).
+        """
+        penalties = penalties or {}
+        n = len(self)
+        lat, lng, indptr = self.lat, self.lng, self.indptr
+        t_lat, t_lng = float(lat[dst]), float(lng[dst])
+        lng_scale = self._lng_scale
+
+        def h(v):
+            dy = (float(lat[v]) - t_lat) * _M_PER_DEG_LAT
+            dx = (float(lng[v]) - t_lng) * lng_scale
+            return math.sqrt(dx * dx + dy * dy) * 0.999
+
+        best = {src: 0.0}
+        came_from = {}
+        done = set()
+        heap = [(h(src), 0.0, src)]
+
+        while heap:
+            _, cost, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if u == dst:
+                break
+            done.add(u)
+
+            start, end = int(indptr[u]), int(indptr[u + 1])
+            targets = self.indices[start:end].tolist()
+            lengths = self.length[start:end].tolist()
+            for offset, (v, w) in enumerate(zip(targets, lengths)):
+                if v in done:
+                    continue
+                new_cost = cost + w * penalties.get(u * n + v, 1.0)
+                if new_cost < best.get(v, math.inf):
+                    best[v] = new_cost
+                    came_from[v] = (u, start + offset)
+                    heapq.heappush(heap, (new_cost + h(v), new_cost, v))
+        else:
+            if src != dst:
+                return None, None
+
+        nodes = [dst]
+        edges = []
+        while nodes[-1] != src:
+            u, edge = came_from[nodes[-1]]
+            edges.append(edge)
+            nodes.append(u)
+
+        return nodes[::-1], edges[::-1]
+
+    def alternatives(self, src, dst, k=3):
+        """Up to k diverse (nodes, edges) paths, shortest first (penalty method)."""
+        n = len(self)
+        penalties = {}
+        found = []
+        shortest = None
+
+        for _ in range(2 * k):
+            nodes, edges = self.shortest_path(src, dst, penalties)
+            if nodes is None:
+                break
+
+            hops = {
+                _undirected(u, v): float(self.length[e])
+                for u, v, e in zip(nodes, nodes[1:], edges)
+            }
+            length = sum(hops.values())
+            if shortest is None:
+                shortest = length
+            elif length > shortest * MAX_STRETCH:
+                break
+
+            if all(_overlap(hops, length, prev) <= MAX_OVERLAP for _, _, prev in found):
+                found.append((nodes, edges, hops))
+                if len(found) == k:
+                    break
+
+            for u, v in zip(nodes, nodes[1:]):
+                factor = penalties.get(u * n + v, 1.0) * PENALTY
+                penalties[u * n + v] = factor
+                penalties[v * n + u] = factor
+
+        return [(nodes, edges) for nodes, edges, _ in found]
+
+    # ---- Directions-shaped output ----
+    def to_route(self, nodes, edges):
+        coords = [(float(self.lat[v]), float(self.lng[v])) for v in nodes]
+        lengths = [float(self.length[e]) for e in edges]
+        name_ids = [int(self.name_id[e]) for e in edges]
+        distance = sum(lengths)
+
+        steps = []
+        i = 0
+        while i < len(edges):
+            j = i
+            while j + 1 < len(edges) and name_ids[j + 1] == name_ids[i]:
+                j += 1
+            steps.append(self._step(coords[i:j + 2], sum(lengths[i:j + 1]), self.names[name_ids[i]]))
+            i = j + 1
+
+        by_name = Counter()
+        for name_id, length in zip(name_ids, lengths):
+            if self.names[name_id]:
+                by_name[self.names[name_id]] += length
+        main_streets = [name for name, _ in by_name.most_common(2)]
+
+        lats = [c[0] for c in coords]
+        lngs = [c[1] for c in coords]
+        start, end = coords[0], coords[-1]
+
+        return {
+            "summary": " and ".join(main_streets) or "Local walking route",
+            "overview_polyline": {"points": polyline.encode(coords)},
+            "bounds": {
+                "northeast": {"lat": max(lats), "lng": max(lngs)},
+                "southwest": {"lat": min(lats), "lng": min(lngs)},
+            },
+            "legs": [{
+                "start_address": f"{start[0]:.6f},{start[1]:.6f}",
+                "end_address": f"{end[0]:.6f},{end[1]:.6f}",
+                "start_location": {"lat": start[0], "lng": start[1]},
+                "end_location": {"lat": end[0], "lng": end[1]},
+                "distance": _distance_field(distance),
+                "duration": _duration_field(distance),
+                "steps": steps,
+            }],
+            "warnings": [],
+            "source": "local",
+        }
+
+    def _step(self, coords, distance, name):
+        return {
+            "html_instructions": f"Walk along <b>{name}</b>" if name else "Walk",
+            "distance": _distance_field(distance),
+            "duration": _duration_field(distance),
+            "start_location": {"lat": coords[0][0], "lng": coords[0][1]},
+            "end_location": {"lat": coords[-1][0], "lng": coords[-1][1]},
+            "polyline": {"points": polyline.encode(coords)},
+        }
+
+    def routes(self, origin_latlng, dest_latlng, waypoint=None, k=3):
+        """
+        Directions-shaped walking routes between two {"lat", "lng"} points,
+        optionally via a waypoint (then a single route, as Google does).
+        """
+        stops = [origin_latlng] + ([waypoint] if waypoint else []) + [dest_latlng]
+        node_ids = [self.nearest_node(p["lat"], p["lng"]) for p in stops]
+        if None in node_ids:
+            return []
+
+        if waypoint:
+            nodes, edges = [node_ids[0]], []
+            for a, b in zip(node_ids, node_ids[1:]):
+                part_nodes, part_edges = self.shortest_path(a, b)
+                if part_nodes is None:
+                    return []
+                nodes += part_nodes[1:]
+                edges += part_edges
+            return [self.to_route(nodes, edges)] if edges else []
+
+        return [
+            self.to_route(nodes, edges)
+            for nodes, edges in self.alternatives(node_ids[0], node_ids[-1], k=k)
+            if edges
+        ]
+
+
+def _undirected(u, v):
+    return (u, v) if u < v else (v, u)
+
+
+def _overlap(hops, length, previous):
+    """Share of a path's length ({hop: metres}) that runs over `previous` path's hops."""
+    if not length:
+        return 1.0
+    return sum(m for hop, m in hops.items() if hop in previous) / length
+
+
+def _distance_field(metres):
+    return {"value": int(round(metres)), "text": f"{metres / 1000:.1f} km"}
+
+
+def _duration_field(metres):
+    seconds = metres / WALK_SPEED_M_S
+    return {"value": int(round(seconds)), "text": f"{max(1, round(seconds / 60))} mins"}
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def get_walk_graph(path):
+    """Process-wide WalkGraph for `path`, loaded (memory-mapped) on first use."""
+    graph = _graphs.get(path)
+    if graph is None:
+        with _graphs_lock:
+            graph = _graphs.get(path)
+            if graph is None:
+                graph = _graphs[path] = WalkGraph.load(path)
+    return graph
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        sys.exit("usage: python -m backend.services.walk_graph build <extract.osm> <out_dir>")
+
+    nodes, edges = build_graph(sys.argv[2], sys.argv[3])
+    print(f"Walking graph: {nodes} nodes, {edges} directed edges -> {sys.argv[3]}")
@@ -0,0 +1,341 @@
+"""
+Offline stand-ins for Google Maps and the chat model.
+
+FakeGoogle answers Geocode / Directions / Places Nearby requests with
+synthetic (or recorded) responses and counts every request it serves;
+StubChatModel answers the agent's structured-output and explanation
+calls after a configurable delay.
+"""
+import asyncio
+import json
+import math
+import re
+import threading
+import time
+import zlib
+
+import polyline
+from langchain_core.messages import AIMessage
+
+from backend.services import maps_service
+from loopwalk_ai import config
+from loopwalk_ai.graph import nodes
+from loopwalk_ai.graph.schemas import (
+    BatchIntentOutput,
+    BatchScoringOutput,
+    IntentOutput,
+    QueryIntent,
+    RequestScores,
+    RouteScore,
+    RouteScoringOutput,
+)
+
+CENTER_LAT = 41.8818
+CENTER_LNG = -87.6231
+
+# Synthetic places sit on a fixed lattice (~65 m apart); each lattice
+# point holds a place for a keyword with that keyword's density
+PLACE_SPACING_DEG = 0.0006
+PLACE_DENSITY = {"cafe": 0.3, "bar": 0.2, "bakery": 0.1, "park": 0.05, "bookstore": 0.04, "museum": 0.02}
+DEFAULT_PLACE_DENSITY = 0.1
+# Google returns at most one page of 20 nearby results
+PLACES_PAGE_SIZE = 20
+
+
+def _hash01(text):
+    """Deterministic float in [0, 1) for `text` (stable across processes)."""
+    return (zlib.crc32(text.encode()) % 10_000) / 10_000
+
+
+def _parse_latlng(value):
+    lat, lng = value.split(",")
+    return float(lat), float(lng)
+
+
+class FakeGoogle:
+    """
+    Drop-in replacement for maps_service._google_get / _agoogle_get.
+
+    - `points`: polyline points per synthetic route
+    - `alternatives`: routes returned per Directions call
+    - `latency_s`: simulated network time per request
+    - `recordings`: optional {endpoint: {request key: response}} consulted
+      before synthesizing (see load_recordings)
+    """
+
+    def __init__(self, points=200, alternatives=1, latency_s=0.0, recordings=None):
+        self.points = points
+        self.alternatives = alternatives
+        self.latency_s = latency_s
+        self.recordings = recordings or {}
+        self.calls = {"geocode": 0, "directions": 0, "places": 0}
+        self._lock = threading.Lock()
+
+    # ---- installation ----
+    def install(self):
+        maps_service._google_get = self.get
+        maps_service._agoogle_get = self.aget
+        return self
+
+    def reset_counts(self):
+        with self._lock:
+            for k in self.calls:
+                self.calls[k] = 0
+
+    # ---- request handling ----
+    def get(self, url, params):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._respond(url, params)
+
+    async def aget(self, url, params):
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self._respond(url, params)
+
+    def _respond(self, url, params):
+        endpoint = {
+            maps_service.GEOCODE_URL: "geocode",
+            maps_service.DIRECTIONS_URL: "directions",
+            maps_service.PLACES_URL: "places",
+        }[url]
+
+        with self._lock:
+            self.calls[endpoint] += 1
+
+        recorded = self.recordings.get(endpoint, {}).get(_recording_key(endpoint, params))
+        if recorded is not None:
+            return recorded
+
+        return getattr(self, f"_{endpoint}")(params)
+
+    def _geocode(self, params):
+        address = params["address"]
+        lat = CENTER_LAT + (_hash01(address) - 0.5) * 0.02
+        lng = CENTER_LNG + (_hash01(address[::-1]) - 0.5) * 0.02
+        return {"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]}
+
+    def _directions(self, params):
+        origin = _parse_latlng(params["origin"])
+        dest = _parse_latlng(params["destination"])
+        waypoint = _parse_latlng(params["waypoints"]) if "waypoints" in params else None
+
+        return {
+            "status": "OK",
+            "routes": [
+                self._route(origin, dest, waypoint, alt)
+                for alt in range(self.alternatives)
+            ],
+        }
+
+    def _route(self, origin, dest, waypoint, alt):
+        anchors = [origin] + ([waypoint] if waypoint else []) + [dest]
+        per_leg = max(2, self.points // (len(anchors) - 1))
+        # each alternative bows ~150 m further sideways, well past dedup tolerance
+        bow = 0.0014 * alt
+
+        coords = []
+        for (lat1, lng1), (lat2, lng2) in zip(anchors, anchors[1:]):
+            for i in range(per_leg):
+                f = i / per_leg
+                side = bow * math.sin(math.pi * f)
+                coords.append((lat1 + (lat2 - lat1) * f + side, lng1 + (lng2 - lng1) * f - side))
+        coords.append(dest)
+
+        distance = sum(
+            maps_service.haversine_m(*a, *b) for a, b in zip(coords, coords[1:])
+        )
+        duration = distance / 1.35  # ~80 m per minute
+
+        leg = {
+            "start_address": f"{origin[0]:.5f},{origin[1]:.5f}",
+            "end_address": f"{dest[0]:.5f},{dest[1]:.5f}",
+            "start_location": {"lat": origin[0], "lng": origin[1]},
+            "end_location": {"lat": dest[0], "lng": dest[1]},
+            "distance": {"value": int(distance), "text": f"{distance / 1000:.1f} km"},
+            "duration": {"value": int(duration), "text": f"{round(duration / 60)} mins"},
+            "steps": [
+                {
+                    "html_instructions": f"Walk to <b>{lat:.4f},{lng:.4f}</b>",
+                    "distance": {"value": int(distance / 4), "text": ""},
+                    "duration": {"value": int(duration / 4), "text": ""},
+                    "polyline": {"points": ""},
+                }
+                for lat, lng in coords[:: max(1, len(coords) // 4)][:4]
+            ],
+        }
+
+        lats = [c[0] for c in coords]
+        lngs = [c[1] for c in coords]
+
+        return {
+            "summary": f"Synthetic route {alt} via {waypoint}",
+            "overview_polyline": {"points": polyline.encode(coords)},
+            "bounds": {
+                "northeast": {"lat": max(lats), "lng": max(lngs)},
+                "southwest": {"lat": min(lats), "lng": min(lngs)},
+            },
+            "legs": [leg],
+            "warnings": [],
+        }
+
+    def _places(self, params):
+        lat, lng = _parse_latlng(params["location"])
+        radius = float(params["radius"])
+        keyword = params.get("keyword", "")
+        density = PLACE_DENSITY.get(keyword, DEFAULT_PLACE_DENSITY)
+
+        span_lat = radius / 111_320
+        span_lng = span_lat / math.cos(math.radians(lat))
+
+        rows = range(
+            math.floor((lat - span_lat) / PLACE_SPACING_DEG),
+            math.ceil((lat + span_lat) / PLACE_SPACING_DEG) + 1,
+        )
+        cols = range(
+            math.floor((lng - span_lng) / PLACE_SPACING_DEG),
+            math.ceil((lng + span_lng) / PLACE_SPACING_DEG) + 1,
+        )
+
+        results = []
+        for row in rows:
+            for col in cols:
+                p_lat = row * PLACE_SPACING_DEG
+                p_lng = col * PLACE_SPACING_DEG
+                if maps_service.haversine_m(lat, lng, p_lat, p_lng) > radius:
+                    continue
+                place_id = f"{keyword}:{row}:{col}"
+                if _hash01(place_id) >= density:
+                    continue
+                results.append({
+                    "place_id": place_id,
+                    "name": f"{keyword.title()} {row % 1000}-{col % 1000}",
+                    "rating": round(3 + 2 * _hash01(place_id[::-1]), 1),
+                    "types": [keyword],
+                    "vicinity": "Synthetic St",
+                    "geometry": {"location": {"lat": p_lat, "lng": p_lng}},
+                })
+                if len(results) == PLACES_PAGE_SIZE:
+                    return {"status": "OK", "results": results}
+
+        return {"status": "OK" if results else "ZERO_RESULTS", "results": results}
+
+
+def _recording_key(endpoint, params):
+    if endpoint == "geocode":
+        return params["address"]
+    if endpoint == "directions":
+        return "|".join(params.get(k, "") for k in ("origin", "destination", "waypoints"))
+    return f"{params['location']}|{params['radius']}|{params.get('keyword', '')}"
+
+
+def load_recordings(path):
+    """
+    Recorded responses from a JSON file shaped like
+    {"geocode": {address: response}, "directions": {"origin|destination|waypoints": response},
+     "places": {"lat,lng|radius|keyword": response}}.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+# -------------------------
+# CHAT MODEL
+# -------------------------
+_ROUTE_ROW = re.compile(r"^(\d+) \|", re.MULTILINE)
+_REQUEST_HEADER = re.compile(r"^Request (\d+):", re.MULTILINE)
+
+
+def _usage(prompt, output_tokens):
+    return {
+        "input_tokens": len(str(prompt)) // 4,
+        "output_tokens": output_tokens,
+        "total_tokens": len(str(prompt)) // 4 + output_tokens,
+    }
+
+
+_INTENT = {"cafes": 0.8, "parks": 0.4, "low_crowd": 0.6, "safety": 0.5}
+
+
+def _scores(prompt):
+    return [
+        RouteScore(route_id=int(i), score=round(_hash01(f"route-{i}"), 3))
+        for i in _ROUTE_ROW.findall(prompt)
+    ]
+
+
+class _StubStructured:
+    def __init__(self, model, schema, include_raw):
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _answer(self, prompt):
+        self.model.count()
+
+        if self.schema is IntentOutput:
+            parsed = IntentOutput(**_INTENT)
+        elif self.schema is BatchIntentOutput:
+            parsed = BatchIntentOutput(intents=[
+                QueryIntent(query_id=int(i), **_INTENT) for i in _ROUTE_ROW.findall(str(prompt))
+            ])
+        elif self.schema is BatchScoringOutput:
+            # "Request <id>:" headers split the prompt into per-request route tables
+            parts = _REQUEST_HEADER.split(str(prompt))[1:]
+            parsed = BatchScoringOutput(requests=[
+                RequestScores(request_id=int(request_id), scores=_scores(section))
+                for request_id, section in zip(parts[::2], parts[1::2])
+            ])
+        else:
+            parsed = RouteScoringOutput(scores=_scores(str(prompt)))
+
+        if not self.include_raw:
+            return parsed
+
+        raw = AIMessage(content="", usage_metadata=_usage(prompt, 40))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def invoke(self, prompt, *args, **kwargs):
+        time.sleep(self.model.latency_s)
+        return self._answer(prompt)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(self.model.latency_s)
+        return self._answer(prompt)
+
+
+class StubChatModel:
+    """Answers like the structured ChatOpenAI the graph uses, after `latency_s`."""
+
+    def __init__(self, latency_s=0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.calls += 1
+
+    def install(self):
+        config.llm = self
+        nodes.llm = self
+        config.get_structured_llm.cache_clear()
+        return self
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        return _StubStructured(self, schema, include_raw)
+
+    def _reply(self, prompt):
+        self.count()
+        return AIMessage(
+            content="This route keeps you near cafes and away from the busiest blocks.",
+            usage_metadata=_usage(prompt, 16),
+        )
+
+    def invoke(self, prompt, *args, **kwargs):
+        time.sleep(self.latency_s)
+        return self._reply(prompt)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(self.latency_s)
+        return self._reply(prompt)
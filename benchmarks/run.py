@@ -0,0 +1,312 @@
+"""
+Offline stage-level benchmarks for the route pipeline.
+
+    python -m benchmarks.run                       # all scenarios
+    python -m benchmarks.run -s large --repeat 5
+    python -m benchmarks.run --candidates 12 --points 1000 --queries 3
+    python -m benchmarks.run --json before.json    # save, then later:
+    python -m benchmarks.run --compare before.json
+
+Google Maps and the chat model are replaced by benchmarks.fakes, so no
+keys or network are needed. Every stage reports median/min wall time,
+peak traced allocations and the external calls it made.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from backend.services import maps_service  # noqa: E402
+from backend.services.metrics_service import STAGE_SECONDS  # noqa: E402
+from backend.services.route_geometry import _decode_cached  # noqa: E402
+from benchmarks.fakes import FakeGoogle, StubChatModel, load_recordings  # noqa: E402
+from loopwalk_ai.intent_cache import intent_cache  # noqa: E402
+from loopwalk_ai.runner import (  # noqa: E402
+    arun_agent,
+    build_candidate,
+    get_graph,
+    initial_state,
+    run_agent,
+    warm_up,
+)
+
+# candidates: routes per request, points: polyline points per route,
+# queries: enrichment keywords per request
+SCENARIOS = {
+    "small": {"candidates": 4, "points": 100, "queries": 1},
+    "medium": {"candidates": 8, "points": 300, "queries": 2},
+    "large": {"candidates": 12, "points": 1000, "queries": 4},
+}
+
+QUERY_POOL = ["cafe", "park", "bakery", "museum", "bookstore", "bar"]
+
+ORIGIN = "Millennium Park, Chicago"
+DESTINATION = "Union Station, Chicago"
+USER_QUERY = "a quiet walk past a couple of good cafes"
+
+# run_agent always asks for the direct route plus this many variations
+NUM_VARIATIONS = 3
+
+NODES = ("node.intent", "node.score", "node.score_local", "node.tie_break", "node.select", "node.explain")
+
+
+def reset_caches():
+    """Drop every in-process cache so each run starts cold."""
+    maps_service.geocode_cache.clear()
+    maps_service.directions_cache.clear()
+    maps_service.places_cache.clear()
+    _decode_cached.cache_clear()
+    intent_cache.clear()
+
+
+class Bench:
+    def __init__(self, google, chat, repeat=3, warm=False):
+        self.google = google
+        self.chat = chat
+        self.repeat = repeat
+        self.warm = warm
+        self.rows = []
+        # stage metrics right after the last timed (untraced) runs
+        self.timed_totals = {}
+
+    def _setup(self, first):
+        if first or not self.warm:
+            reset_caches()
+        self.google.reset_counts()
+        self.chat.calls = 0
+
+    def measure(self, scenario, stage, fn):
+        """Time `fn` over `repeat` runs, then trace one more run's allocations."""
+        times = []
+        for i in range(self.repeat):
+            self._setup(first=i == 0)
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        calls = dict(self.google.calls, llm=self.chat.calls)
+        self.timed_totals = STAGE_SECONDS.totals()
+
+        self._setup(first=False)
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        row = {
+            "scenario": scenario,
+            "stage": stage,
+            "median_ms": round(statistics.median(times) * 1000, 3),
+            "min_ms": round(min(times) * 1000, 3),
+            "peak_kib": round(peak / 1024, 1),
+            **calls,
+        }
+        self.rows.append(row)
+        return row
+
+    def node_rows(self, scenario, before):
+        """Per-node mean time from the metrics recorded during the last measure()."""
+        after = self.timed_totals
+        for node in NODES:
+            count, total = after.get((node,), (0, 0.0))
+            count0, total0 = before.get((node,), (0, 0.0))
+            if count > count0:
+                self.rows.append({
+                    "scenario": scenario,
+                    "stage": f"  {node}",
+                    "median_ms": round((total - total0) / (count - count0) * 1000, 3),
+                    "min_ms": None,
+                    "peak_kib": None,
+                    "geocode": None,
+                    "directions": None,
+                    "places": None,
+                    "llm": None,
+                })
+
+
+def run_scenario(bench, name, candidates, points, queries, scoring_mode):
+    bench.google.points = points
+    bench.google.alternatives = math.ceil(candidates / (NUM_VARIATIONS + 1))
+    keywords = QUERY_POOL[:queries]
+
+    state = {}
+
+    def fetch():
+        state["routes"] = maps_service.get_many_routes(
+            ORIGIN, DESTINATION, num_variations=NUM_VARIATIONS
+        )
+
+    def enrich_places():
+        for route in state["routes"]:
+            maps_service.enrich_route(route, keywords)
+
+    def enrich_crowd():
+        for route in state["routes"]:
+            maps_service.enrich_with_crowd(route)
+
+    def enrich_safety():
+        for route in state["routes"]:
+            maps_service.enrich_with_safety(route)
+
+    def candidates_():
+        [build_candidate(r, idx, keywords) for idx, r in enumerate(state["routes"])]
+
+    def graph():
+        get_graph().invoke(
+            initial_state(ORIGIN, DESTINATION, USER_QUERY, state["routes"], keywords, scoring_mode)
+        )
+
+    def pipeline():
+        run_agent(ORIGIN, DESTINATION, USER_QUERY, keywords, scoring_mode=scoring_mode)
+
+    def pipeline_async():
+        asyncio.run(arun_agent(ORIGIN, DESTINATION, USER_QUERY, keywords, scoring_mode=scoring_mode))
+
+    bench.measure(name, "geocode_address", lambda: maps_service.geocode_address(ORIGIN))
+    bench.measure(name, "get_many_routes", fetch)
+    bench.measure(name, "enrich_route", enrich_places)
+    bench.measure(name, "enrich_with_crowd", enrich_crowd)
+    bench.measure(name, "enrich_with_safety", enrich_safety)
+    bench.measure(name, "build_candidate", candidates_)
+
+    before = STAGE_SECONDS.totals()
+    bench.measure(name, "graph", graph)
+    bench.node_rows(name, before)
+
+    bench.measure(name, "run_agent", pipeline)
+    bench.measure(name, "arun_agent", pipeline_async)
+
+    return len(state["routes"])
+
+
+# Keyword dense enough that most block searches would come back full
+DENSE_KEYWORD = "cafe"
+
+
+def check_planner(google, candidates=8, points=300):
+    """
+    Places calls of enrichment with and without the coverage planner for
+    DENSE_KEYWORD on cold caches. The planner must never cost more calls
+    than fetching tiles one by one.
+    """
+    google.points = points
+    google.alternatives = math.ceil(candidates / (NUM_VARIATIONS + 1))
+    routes = maps_service.get_many_routes(ORIGIN, DESTINATION, num_variations=NUM_VARIATIONS)
+
+    counts = {}
+    for planned in (False, True):
+        reset_caches()
+        google.reset_counts()
+        if planned:
+            maps_service.enrich_routes([dict(r) for r in routes], [DENSE_KEYWORD])
+        else:
+            for route in routes:
+                maps_service.enrich_route(dict(route), [DENSE_KEYWORD])
+        counts[planned] = google.calls["places"]
+
+    assert counts[True] <= counts[False], (
+        f"planner made {counts[True]} Places calls for {DENSE_KEYWORD!r}, "
+        f"more than {counts[False]} without it"
+    )
+    return counts[False], counts[True]
+
+
+# -------------------------
+# REPORT
+# -------------------------
+COLUMNS = ("stage", "median_ms", "min_ms", "peak_kib", "geocode", "directions", "places", "llm")
+
+
+def format_table(rows, baseline=None):
+    baseline = {(r["scenario"], r["stage"]): r for r in baseline or []}
+    columns = COLUMNS + (("vs_base",) if baseline else ())
+
+    lines = []
+    for scenario in dict.fromkeys(r["scenario"] for r in rows):
+        table = [columns]
+        for r in rows:
+            if r["scenario"] != scenario:
+                continue
+            cells = ["-" if r[c] is None else str(r[c]) for c in COLUMNS]
+            if baseline:
+                base = baseline.get((scenario, r["stage"]))
+                if base and base["median_ms"]:
+                    cells.append(f"{(r['median_ms'] / base['median_ms'] - 1) * 100:+.1f}%")
+                else:
+                    cells.append("-")
+            table.append(cells)
+
+        widths = [max(len(row[i]) for row in table) for i in range(len(columns))]
+        lines.append(f"\n== {scenario} ==")
+        for row in table:
+            lines.append("  ".join(
+                cell.ljust(w) if i == 0 else cell.rjust(w)
+                for i, (cell, w) in enumerate(zip(row, widths))
+            ))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--candidates", type=int, help="custom scenario: routes per request")
+    parser.add_argument("--points", type=int, help="custom scenario: polyline points per route")
+    parser.add_argument("--queries", type=int, help="custom scenario: enrichment keywords")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warm", action="store_true", help="keep caches between repeats")
+    parser.add_argument("--google-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--scoring-mode", default="llm", choices=("llm", "local", "hybrid"))
+    parser.add_argument("--recordings", help="JSON file of recorded Google responses")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file from an earlier run to diff against")
+    args = parser.parse_args(argv)
+
+    if any(v is not None for v in (args.candidates, args.points, args.queries)):
+        scenarios = {"custom": {
+            "candidates": args.candidates or SCENARIOS["medium"]["candidates"],
+            "points": args.points or SCENARIOS["medium"]["points"],
+            "queries": min(args.queries or SCENARIOS["medium"]["queries"], len(QUERY_POOL)),
+        }}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in args.scenario or SCENARIOS}
+
+    google = FakeGoogle(
+        latency_s=args.google_latency_ms / 1000,
+        recordings=load_recordings(args.recordings) if args.recordings else None,
+    ).install()
+    chat = StubChatModel(latency_s=args.llm_latency_ms / 1000).install()
+    warm_up()
+
+    bench = Bench(google, chat, repeat=args.repeat, warm=args.warm)
+    for name, params in scenarios.items():
+        count = run_scenario(bench, name, scoring_mode=args.scoring_mode, **params)
+        print(f"{name}: {count} candidates, {params['points']} points/route, {params['queries']} queries")
+
+    unplanned, planned = check_planner(google)
+    print(f"planner ({DENSE_KEYWORD}): {planned} Places calls vs {unplanned} without")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["rows"]
+
+    print(format_table(bench.rows, baseline))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "rows": bench.rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ export type RouteRequest = {
   destination: string;
   user_query: string;
   enrichment_queries: string[];
+  scoring_mode?: "llm" | "local" | "hybrid";
+  response_mode?: "full" | "compact";
+  fields?: string[];
+  include_steps?: boolean;
 };
 
 export type DurationRouteRequest = {
@@ -10,6 +14,10 @@ export type DurationRouteRequest = {
   minutes: number;
   user_query: string;
   enrichment_queries: string[];
+  scoring_mode?: "llm" | "local" | "hybrid";
+  response_mode?: "full" | "compact";
+  fields?: string[];
+  include_steps?: boolean;
 };
 
 export type RouteData = Record<string, unknown> & {
@@ -56,6 +64,80 @@ async function postJson<T>(path: string, body: unknown): Promise<T> {
   return response.json() as Promise<T>;
 }
 
+export type RouteStreamEvent =
+  | { event: "candidates"; data: RoutePreview[] }
+  | { event: "enrichment"; data: RouteEnrichmentSummary }
+  | { event: "preferences"; data: Record<string, number> }
+  | { event: "scores"; data: { route_id: number; score: number }[] }
+  | { event: "chosen"; data: { route_id: number; summary: string; static_map_url: string | null } }
+  | { event: "explanation_token"; data: { text: string } }
+  | { event: "error"; data: { detail: string } }
+  | { event: "result"; data: RouteResponse }
+  | { event: "done"; data: Record<string, never> };
+
+export type RoutePreview = {
+  route_id: number;
+  summary: string;
+  overview_polyline: string | null;
+  bounds: Record<string, unknown> | null;
+  distance_m: number | null;
+  duration_s: number | null;
+};
+
+export type RouteEnrichmentSummary = {
+  route_id: number;
+  pois: Record<string, string[]>;
+  crowd: { avg_density: number; max_density: number } | null;
+  safety: { avg_risk: number; max_risk: number } | null;
+};
+
+// POSTs and reads a server-sent event stream (EventSource only supports GET).
+async function postEventStream(
+  path: string,
+  body: unknown,
+  onEvent: (event: RouteStreamEvent) => void,
+): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify(body),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed (${response.status}): ${path}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+
+      onEvent({ event, data: data ? JSON.parse(data) : {} } as RouteStreamEvent);
+    }
+  }
+}
+
 export const loopwalkApi = {
   health: async () => {
     const response = await fetch(`${API_BASE_URL}/health`);
@@ -66,4 +148,11 @@ export const loopwalkApi = {
   route: (payload: RouteRequest) => postJson<RouteResponse>("/route", payload),
   routeByDuration: (payload: DurationRouteRequest) =>
     postJson<RouteResponse>("/route/by-duration", payload),
+
+  routeStream: (payload: RouteRequest, onEvent: (event: RouteStreamEvent) => void) =>
+    postEventStream("/route/stream", payload, onEvent),
+  routeByDurationStream: (
+    payload: DurationRouteRequest,
+    onEvent: (event: RouteStreamEvent) => void,
+  ) => postEventStream("/route/by-duration/stream", payload, onEvent),
 };
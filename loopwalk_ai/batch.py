@@ -0,0 +1,93 @@
+import asyncio
+
+from backend.services.metrics_service import get_logger, record_llm_usage, timed
+from loopwalk_ai.config import BATCH_LLM_ITEMS, get_structured_llm
+from loopwalk_ai.graph.schemas import BatchIntentOutput, BatchScoringOutput
+from loopwalk_ai.intent_cache import alookup_intent, aremember_intent
+from loopwalk_ai.prompts import BATCH_INTENT_PROMPT, BATCH_SCORING_PROMPT, BATCH_SCORING_SECTION
+from loopwalk_ai.serialization import format_candidates
+
+# Combined LLM calls for /routes/batch. They only pre-fill what the graph
+# nodes would otherwise ask for one request at a time (intent_cache and
+# state["route_scores"]); anything a combined call misses or fails on is
+# left for the normal per-request nodes.
+
+logger = get_logger("batch")
+
+
+def _chunks(items, size=BATCH_LLM_ITEMS):
+    return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+
+
+def _parsed(node, result):
+    """Unpack an include_raw structured-output result, counting its tokens."""
+    record_llm_usage(node, result["raw"])
+
+    if result.get("parsing_error") is not None:
+        raise result["parsing_error"]
+    return result["parsed"]
+
+
+async def _aintents_chunk(queries):
+    structured_llm = get_structured_llm(BatchIntentOutput)
+    result = await structured_llm.ainvoke(
+        BATCH_INTENT_PROMPT.format(queries="\n".join(f"{i} | {q}" for i, q in enumerate(queries)))
+    )
+
+    for intent in _parsed("batch.intent", result).intents:
+        if 0 <= intent.query_id < len(queries):
+            preferences = intent.model_dump(exclude={"query_id"}, exclude_none=True)
+            await aremember_intent(queries[intent.query_id], preferences)
+
+
+@timed("batch.intent")
+async def aprefill_intents(queries):
+    """Extract and cache intents of all uncached `queries`, several per LLM call."""
+    missing = [q for q in dict.fromkeys(queries) if await alookup_intent(q) is None]
+
+    results = await asyncio.gather(
+        *(_aintents_chunk(chunk) for chunk in _chunks(missing)), return_exceptions=True
+    )
+    for error in results:
+        if isinstance(error, Exception):
+            logger.warning("Combined intent call failed, using per-request calls: %s", error)
+
+
+def _scoring_section(request_id, state):
+    return BATCH_SCORING_SECTION.format(
+        request_id=request_id,
+        query=state["query"],
+        preferences=state["preferences"],
+        routes=format_candidates(state["routes"]),
+    )
+
+
+async def _ascores_chunk(states):
+    structured_llm = get_structured_llm(BatchScoringOutput)
+    result = await structured_llm.ainvoke(
+        BATCH_SCORING_PROMPT.format(
+            requests="\n".join(_scoring_section(i, s) for i, s in enumerate(states))
+        )
+    )
+
+    for scored in _parsed("batch.score", result).requests:
+        if not 0 <= scored.request_id < len(states):
+            continue
+        state = states[scored.request_id]
+        route_ids = {r["route_id"] for r in state["routes"]}
+        scores = [s.model_dump() for s in scored.scores if s.route_id in route_ids]
+        if scores:
+            state["route_scores"] = scores
+
+
+@timed("batch.score")
+async def aprefill_scores(states):
+    """Set route_scores on graph input `states`, several requests per LLM call."""
+    states = [s for s in states if s["routes"] and s.get("preferences") is not None]
+
+    results = await asyncio.gather(
+        *(_ascores_chunk(chunk) for chunk in _chunks(states)), return_exceptions=True
+    )
+    for error in results:
+        if isinstance(error, Exception):
+            logger.warning("Combined scoring call failed, using per-request calls: %s", error)
@@ -1,4 +1,6 @@
 import os
+from functools import lru_cache
+
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
@@ -6,10 +8,40 @@ load_dotenv()
 
 MODEL_NAME = "gpt-4o"   # or whatever you choose
 
+# Route scoring: "llm" (GPT scores every route), "local" (deterministic
+# feature scoring) or "hybrid" (local, with the LLM breaking near-ties).
+# Requests may override this per call.
+SCORING_MODE = os.getenv("LOOPWALK_SCORING_MODE", "llm")
+SCORING_MODES = ("llm", "local", "hybrid")
+if SCORING_MODE not in SCORING_MODES:
+    raise ValueError(
+        f"LOOPWALK_SCORING_MODE must be one of {', '.join(SCORING_MODES)}, got {SCORING_MODE!r}"
+    )
+
+# In hybrid mode, routes within this margin of the best local score are tied
+TIE_BREAK_MARGIN = float(os.getenv("LOOPWALK_TIE_BREAK_MARGIN", "0.05"))
+
+# Max tokens used to describe candidate routes in SCORING_PROMPT
+SCORING_TOKEN_BUDGET = int(os.getenv("LOOPWALK_SCORING_TOKEN_BUDGET", "1200"))
+
+# /routes/batch: intents / route scores of up to this many requests share one LLM call
+BATCH_LLM_ITEMS = int(os.getenv("LOOPWALK_BATCH_LLM_ITEMS", "8"))
+
 llm = ChatOpenAI(
-    model=MODEL_NAME
+    model=MODEL_NAME,
+    stream_usage=True,  # token usage on streamed responses too
 )
 
+
+@lru_cache(maxsize=None)
+def get_structured_llm(schema):
+    """
+    Structured-output runnable for `schema`, built once per process and
+    shared by every request (the runnable itself holds no per-call state).
+    Returns {"raw", "parsed", "parsing_error"} so token usage is available.
+    """
+    return llm.with_structured_output(schema, include_raw=True)
+
 # # test llm working
 # response = llm.invoke("Hello, world!")
 # print(response.content)
\ No newline at end of file
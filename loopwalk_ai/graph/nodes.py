@@ -1,38 +1,187 @@
-from loopwalk_ai.config import llm
+from backend.services.metrics_service import record_llm_usage, timed
+from loopwalk_ai.config import SCORING_MODE, TIE_BREAK_MARGIN, get_structured_llm, llm
 from loopwalk_ai.graph.schemas import IntentOutput, RouteScoringOutput
 from loopwalk_ai.prompts import INTENT_PROMPT, SCORING_PROMPT, EXPLANATION_PROMPT
 from loopwalk_ai.graph.state import AgentState
+from loopwalk_ai.intent_cache import alookup_intent, aremember_intent, lookup_intent, remember_intent
+from loopwalk_ai.scoring import score_candidates
+from loopwalk_ai.serialization import format_candidates, poi_digest
 
+# Each LLM node has a sync and an async (a*) variant sharing the same
+# prompt building and result handling; the graph picks one per invoke/ainvoke.
 
+
+def _record_usage(state: AgentState, node: str, message):
+    """
+    Count the tokens of an LLM reply in the token metrics and add them to
+    state["token_usage"].
+    """
+    prompt, completion = record_llm_usage(node, message)
+    totals = state.get("token_usage") or {}
+
+    node_totals = totals.setdefault(node, {"prompt_tokens": 0, "completion_tokens": 0})
+    node_totals["prompt_tokens"] += prompt
+    node_totals["completion_tokens"] += completion
+
+    state["token_usage"] = totals
+
+def _parsed(state: AgentState, node: str, result):
+    """Unpack an include_raw structured-output result, recording its usage."""
+    _record_usage(state, node, result["raw"])
+
+    if result.get("parsing_error") is not None:
+        raise result["parsing_error"]
+
+    return result["parsed"]
+
+
+@timed("node.intent")
 def intent_node(state: AgentState):
     query = state["query"]
 
-    structured_llm = llm.with_structured_output(IntentOutput)
+    # presets and repeated phrasings skip the LLM entirely
+    cached = lookup_intent(query)
+    if cached is not None:
+        state["preferences"] = cached
+        return state
+
+    structured_llm = get_structured_llm(IntentOutput)
 
     result = structured_llm.invoke(
         INTENT_PROMPT.format(query=query)
     )
 
+    _apply_intent(state, _parsed(state, "intent", result))
+    remember_intent(query, state["preferences"])
+
+    return state
+
+@timed("node.intent")
+async def aintent_node(state: AgentState):
+    query = state["query"]
+
+    cached = await alookup_intent(query)
+    if cached is not None:
+        state["preferences"] = cached
+        return state
+
+    structured_llm = get_structured_llm(IntentOutput)
+
+    result = await structured_llm.ainvoke(
+        INTENT_PROMPT.format(query=query)
+    )
+
+    _apply_intent(state, _parsed(state, "intent", result))
+    await aremember_intent(query, state["preferences"])
+
+    return state
+
+def _apply_intent(state: AgentState, result: IntentOutput):
     # Convert pydantic model → dict
     state["preferences"] = result.model_dump(exclude_none=True)
 
     return state
 
+def _scoring_prompt(state: AgentState, routes):
+    return SCORING_PROMPT.format(
+        query=state["query"],
+        preferences=state["preferences"],
+        routes=format_candidates(routes)
+    )
+
+@timed("node.score")
 def scoring_node(state):
-    structured_llm = llm.with_structured_output(RouteScoringOutput)
+    # a batch request may have scored these routes in a combined call
+    if state.get("route_scores"):
+        return state
+
+    structured_llm = get_structured_llm(RouteScoringOutput)
+
+    result = structured_llm.invoke(_scoring_prompt(state, state["routes"]))
+    result = _parsed(state, "score", result)
+
+    state["route_scores"] = [r.model_dump() for r in result.scores]
+
+    return state
+
+@timed("node.score")
+async def ascoring_node(state):
+    # a batch request may have scored these routes in a combined call
+    if state.get("route_scores"):
+        return state
+
+    structured_llm = get_structured_llm(RouteScoringOutput)
+
+    result = await structured_llm.ainvoke(_scoring_prompt(state, state["routes"]))
+    result = _parsed(state, "score", result)
+
+    state["route_scores"] = [r.model_dump() for r in result.scores]
+
+    return state
+
+@timed("node.score_local")
+def local_scoring_node(state: AgentState):
+    """Score every candidate locally from the intent weights (no LLM call)."""
+    state["route_scores"] = score_candidates(state["routes"], state["preferences"])
+
+    return state
+
+def tied_route_ids(state: AgentState):
+    """Route ids whose local score is within TIE_BREAK_MARGIN of the best."""
+    scores = state["route_scores"] or []
+    if not scores:
+        return []
+
+    best = max(s["score"] for s in scores)
+    return [s["route_id"] for s in scores if best - s["score"] <= TIE_BREAK_MARGIN]
+
+@timed("node.tie_break")
+def tie_break_node(state: AgentState):
+    """
+    Ask the LLM to rank only the near-tied routes. Their scores are
+    re-spread inside the tie margin, so they still rank above every
+    route that was not tied.
+    """
+    tied = set(tied_route_ids(state))
+    structured_llm = get_structured_llm(RouteScoringOutput)
 
     result = structured_llm.invoke(
-        SCORING_PROMPT.format(
-            query=state["query"],
-            preferences=state["preferences"],
-            routes=state["routes"]
-        )
+        _scoring_prompt(state, [r for r in state["routes"] if r["route_id"] in tied])
     )
 
-    state["route_scores"] = [r.model_dump() for r in result.scores]
+    return _apply_tie_break(state, tied, _parsed(state, "tie_break", result))
+
+@timed("node.tie_break")
+async def atie_break_node(state: AgentState):
+    tied = set(tied_route_ids(state))
+    structured_llm = get_structured_llm(RouteScoringOutput)
+
+    result = await structured_llm.ainvoke(
+        _scoring_prompt(state, [r for r in state["routes"] if r["route_id"] in tied])
+    )
+
+    return _apply_tie_break(state, tied, _parsed(state, "tie_break", result))
+
+def _apply_tie_break(state: AgentState, tied, result: RouteScoringOutput):
+    llm_scores = {r.route_id: r.score for r in result.scores if r.route_id in tied}
+    best = max(s["score"] for s in state["route_scores"])
+
+    for s in state["route_scores"]:
+        if s["route_id"] in llm_scores:
+            s["score"] = round(best - TIE_BREAK_MARGIN * (1 - llm_scores[s["route_id"]]), 4)
 
     return state
 
+def scoring_mode_router(state: AgentState):
+    """Pick the scoring node for this request (falls back to the deployment default)."""
+    return state.get("scoring_mode") or SCORING_MODE
+
+def tie_break_router(state: AgentState):
+    if scoring_mode_router(state) == "hybrid" and len(tied_route_ids(state)) > 1:
+        return "tie_break"
+    return "select"
+
+@timed("node.select")
 def select_best_route_node(state: AgentState):
     scores = state["route_scores"]
 
@@ -44,7 +193,7 @@ def select_best_route_node(state: AgentState):
 
     return state
 
-def explanation_node(state: AgentState):
+def _explanation_prompt(state: AgentState):
     chosen_id = state["chosen_route_id"]
     query = state["query"]
 
@@ -58,16 +207,28 @@ def explanation_node(state: AgentState):
     if chosen is None:
         raise ValueError("Chosen route not found in candidates")
 
-    prompt = EXPLANATION_PROMPT.format(
+    return EXPLANATION_PROMPT.format(
         query=query,
         summary=chosen["summary"],
         distance_m=chosen["distance_m"],
         duration_s=chosen["duration_s"],
-        pois=chosen.get("pois", {})
+        pois=poi_digest(chosen)
     )
 
-    response = llm.invoke(prompt)
+@timed("node.explain")
+def explanation_node(state: AgentState):
+    response = llm.invoke(_explanation_prompt(state))
+    _record_usage(state, "explain", response)
 
     state["explanation"] = response.content.strip()
 
-    return state
\ No newline at end of file
+    return state
+
+@timed("node.explain")
+async def aexplanation_node(state: AgentState):
+    response = await llm.ainvoke(_explanation_prompt(state))
+    _record_usage(state, "explain", response)
+
+    state["explanation"] = response.content.strip()
+
+    return state
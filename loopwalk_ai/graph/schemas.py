@@ -33,4 +33,22 @@ class RouteScore(BaseModel):
 
 
 class RouteScoringOutput(BaseModel):
-    scores: List[RouteScore]
\ No newline at end of file
+    scores: List[RouteScore]
+
+
+# Batch requests: several users' intents / route sets in one LLM call
+class QueryIntent(IntentOutput):
+    query_id: int
+
+
+class BatchIntentOutput(BaseModel):
+    intents: List[QueryIntent]
+
+
+class RequestScores(BaseModel):
+    request_id: int
+    scores: List[RouteScore]
+
+
+class BatchScoringOutput(BaseModel):
+    requests: List[RequestScores]
@@ -8,8 +8,12 @@ class AgentState(TypedDict):
     query: str
 
     routes: List[RouteCandidate]
+    scoring_mode: Optional[str]
 
     preferences: Optional[Dict[str, float]]
     route_scores: Optional[List[Dict]]
     chosen_route_id: Optional[int]
-    explanation: Optional[str]
\ No newline at end of file
+    explanation: Optional[str]
+
+    # {node: {"prompt_tokens", "completion_tokens"}} for each LLM call made
+    token_usage: Optional[Dict[str, Dict[str, int]]]
\ No newline at end of file
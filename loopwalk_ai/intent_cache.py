@@ -0,0 +1,69 @@
+import os
+
+from backend.services.cache_service import normalize_key, tiered_cache
+
+INTENT_CACHE_SIZE = int(os.getenv("LOOPWALK_INTENT_CACHE_SIZE", "4096"))
+INTENT_CACHE_TTL_S = float(os.getenv("LOOPWALK_INTENT_CACHE_TTL_S", str(30 * 24 * 3600)))
+# Set to a file path to persist intents in their own file; otherwise they
+# share LOOPWALK_CACHE_PATH (if set) with the other caches
+INTENT_CACHE_PATH = os.getenv("LOOPWALK_INTENT_CACHE_PATH")
+
+# Fixed intents for the quick-goal presets sent by GoalSelectionScreen
+# (and a few very common phrasings). These never hit the LLM.
+PRESET_INTENTS = {
+    # energy presets
+    "energetic": {"parks": 0.4, "short_distance": 0.2},
+    "moderate": {"parks": 0.5, "cafes": 0.3, "low_crowd": 0.4},
+    "relaxed": {"parks": 0.8, "low_crowd": 0.8, "cafes": 0.4},
+    # food presets
+    "cozy cafes": {"cafes": 1.0, "low_crowd": 0.5},
+    "dining destinations": {"cafes": 0.8},
+    "social gathering spots": {"cafes": 0.7},
+    "chicago food classics": {"cafes": 0.8},
+    "brunch & walk": {"cafes": 0.9, "parks": 0.3},
+    # category fallbacks when no item was picked
+    "historic walk": {"safety": 0.5, "low_crowd": 0.3},
+    "movie locations walk": {"safety": 0.5},
+    "energy based walk": {"parks": 0.5},
+    "food walk": {"cafes": 0.9},
+    # common free-text requests
+    "calm walk with a cafe": {"cafes": 0.8, "low_crowd": 0.8, "parks": 0.4},
+    "safe walk at night": {"safety": 1.0, "low_crowd": 0.3},
+}
+
+intent_cache = tiered_cache("intent", INTENT_CACHE_SIZE, INTENT_CACHE_TTL_S, path=INTENT_CACHE_PATH)
+
+
+def lookup_intent(query: str):
+    """Preset or previously extracted preferences for `query`, else None."""
+    key = normalize_key(query)
+
+    preset = PRESET_INTENTS.get(key)
+    if preset is not None:
+        return dict(preset)
+
+    cached = intent_cache.get(key)
+    return dict(cached) if cached is not None else None
+
+
+async def alookup_intent(query: str):
+    """Async lookup_intent; shared cache tiers are read off the event loop."""
+    key = normalize_key(query)
+
+    preset = PRESET_INTENTS.get(key)
+    if preset is not None:
+        return dict(preset)
+
+    cached = await intent_cache.aget(key)
+    return dict(cached) if cached is not None else None
+
+
+def remember_intent(query: str, preferences: dict):
+    # an empty intent is not worth pinning for a month
+    if preferences:
+        intent_cache.set(normalize_key(query), preferences)
+
+
+async def aremember_intent(query: str, preferences: dict):
+    if preferences:
+        await intent_cache.aset(normalize_key(query), preferences)
@@ -30,7 +30,7 @@ User request:
 Interpreted preferences:
 {preferences}
 
-Routes:
+Routes (one table row per route; crowd = people per m², safety = risk 0–1, lower is better for both):
 {routes}
 
 Assign a score between 0 and 1 to each route.
@@ -47,6 +47,55 @@ Consider:
 Return structured scores for each route.
 """
 
+BATCH_INTENT_PROMPT = """
+You are an assistant that interprets walking preferences for several users at once.
+
+Your task:
+Convert each user's request into preference weights between 0 and 1.
+
+Available preferences:
+- cafes (desire to pass cafes or places to stop)
+- parks (desire for scenic or green areas)
+- safety (preference for safer routes)
+- low_crowd (preference for quieter streets)
+- short_distance (preference for shortest walk)
+
+Rules:
+- Judge every request on its own; they come from different users.
+- Only include preferences relevant to that request.
+- At least ONE preference must be assigned per request.
+- Values should reflect importance (0.1 weak → 1.0 strong).
+- Return exactly one entry per query_id, as structured output.
+
+User requests (one per line, query_id | request):
+{queries}
+"""
+
+BATCH_SCORING_PROMPT = """
+You are evaluating walking routes for several users at once.
+Each request below has its own user, preferences and candidate routes;
+score the routes of each request only against that request.
+
+(crowd = people per m², safety = risk 0–1, lower is better for both)
+
+{requests}
+
+For every request, assign each of its routes a score between 0 and 1.
+Higher score = better match to that user's goals. Consider presence and
+quality of POIs, safety levels, crowd density, walking distance and the
+overall experience.
+
+Return structured scores grouped by request_id.
+"""
+
+BATCH_SCORING_SECTION = """
+Request {request_id}:
+User request: {query}
+Interpreted preferences: {preferences}
+Routes (one table row per route):
+{routes}
+"""
+
 EXPLANATION_PROMPT = """
 You are an urban walking assistant.
 
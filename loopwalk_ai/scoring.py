@@ -0,0 +1,118 @@
+import functools
+import re
+import unicodedata
+
+import numpy as np
+
+from loopwalk_ai.graph.schemas import RouteCandidate
+
+# POI query keywords that count towards each POI preference; a query matches
+# when one of its words is a keyword or its plural ("parks", not "parking")
+PREFERENCE_KEYWORDS = {
+    "cafes": ("cafe", "coffee", "bakery", "tea"),
+    "parks": ("park", "garden", "green", "nature"),
+}
+
+# Used when the intent step produced no weights at all
+DEFAULT_PREFERENCES = {
+    "cafes": 0.2,
+    "parks": 0.2,
+    "safety": 0.2,
+    "low_crowd": 0.2,
+    "short_distance": 0.2,
+}
+
+
+def _normalize(values: np.ndarray, higher_is_better: bool = True) -> np.ndarray:
+    """Min-max scale across candidates to 0-1. Flat features score 0.5."""
+    lo = values.min()
+    hi = values.max()
+
+    if hi - lo < 1e-9:
+        return np.full(values.shape, 0.5)
+
+    scaled = (values - lo) / (hi - lo)
+    return scaled if higher_is_better else 1.0 - scaled
+
+
+_WORD = re.compile(r"[a-z]+")
+
+
+@functools.lru_cache(maxsize=1024)
+def _query_words(query: str) -> frozenset[str]:
+    """Words of a POI query (accents dropped) plus their singular forms."""
+    ascii_query = unicodedata.normalize("NFKD", query).encode("ascii", "ignore").decode()
+    words = set()
+    for word in _WORD.findall(ascii_query.lower()):
+        words.add(word)
+        if word.endswith("ies"):
+            words.add(word[:-3] + "y")
+        elif word.endswith("s"):
+            words.add(word[:-1])
+    return frozenset(words)
+
+
+def _poi_stats(candidate: RouteCandidate, keywords) -> tuple[int, float]:
+    """Number of matching POIs and their mean rating (0 when unrated)."""
+    count = 0
+    ratings = []
+
+    for query, places in candidate.get("pois", {}).items():
+        if _query_words(query).isdisjoint(keywords):
+            continue
+        count += len(places)
+        ratings.extend(p["rating"] for p in places if p.get("rating"))
+
+    return count, (sum(ratings) / len(ratings) if ratings else 0.0)
+
+
+def feature_matrix(candidates: list[RouteCandidate]) -> dict[str, np.ndarray]:
+    """
+    Per-preference feature columns, each normalized to 0-1 across all
+    candidates (1 = best match for that preference).
+    """
+    features = {}
+
+    for pref, keywords in PREFERENCE_KEYWORDS.items():
+        stats = np.array([_poi_stats(c, keywords) for c in candidates], dtype=np.float64)
+        features[pref] = 0.7 * _normalize(stats[:, 0]) + 0.3 * _normalize(stats[:, 1])
+
+    crowd = np.array([0.7 * c["crowd_avg"] + 0.3 * c["crowd_max"] for c in candidates], dtype=np.float64)
+    safety = np.array([0.7 * c["safety_avg"] + 0.3 * c["safety_max"] for c in candidates], dtype=np.float64)
+    distance = np.array([c["distance_m"] for c in candidates], dtype=np.float64)
+
+    features["low_crowd"] = _normalize(crowd, higher_is_better=False)
+    features["safety"] = _normalize(safety, higher_is_better=False)
+    features["short_distance"] = _normalize(distance, higher_is_better=False)
+
+    return features
+
+
+def score_candidates(candidates: list[RouteCandidate], preferences: dict | None) -> list[dict]:
+    """
+    Deterministic local replacement for the LLM scoring step.
+    Score = preference-weighted mean of the normalized features, in 0-1.
+    Returns the same shape as scoring_node: [{"route_id", "score"}, ...].
+    """
+    if not candidates:
+        return []
+
+    weights = {k: v for k, v in (preferences or {}).items() if v}
+    if not weights:
+        weights = DEFAULT_PREFERENCES
+
+    features = feature_matrix(candidates)
+
+    total = np.zeros(len(candidates))
+    weight_sum = 0.0
+    for pref, weight in weights.items():
+        if pref in features:
+            total += weight * features[pref]
+            weight_sum += weight
+
+    scores = total / weight_sum if weight_sum else np.full(len(candidates), 0.5)
+
+    return [
+        {"route_id": c["route_id"], "score": round(float(s), 4)}
+        for c, s in zip(candidates, scores)
+    ]
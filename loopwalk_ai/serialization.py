@@ -0,0 +1,118 @@
+from functools import lru_cache
+
+from loopwalk_ai.config import MODEL_NAME, SCORING_TOKEN_BUDGET
+from loopwalk_ai.graph.schemas import RouteCandidate
+
+# Detail levels tried in order until the routes fit the token budget:
+# (POI names listed per query, max summary length). None = no POI digest.
+_DETAIL_LEVELS = [
+    (3, 40),
+    (2, 32),
+    (1, 24),
+    (None, 24),
+    (None, 0),
+]
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(MODEL_NAME)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken missing or its BPE files unavailable (offline)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for `text`; falls back to ~4 chars per token without tiktoken."""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def _poi_stats(places):
+    ratings = [p["rating"] for p in places if p.get("rating")]
+    avg = round(sum(ratings) / len(ratings), 1) if ratings else "-"
+    return len(places), avg
+
+
+def _ranked_names(places, limit):
+    ranked = sorted(places, key=lambda p: p.get("rating") or 0, reverse=True)
+    return ", ".join(
+        f"{p.get('name')} ({p['rating']})" if p.get("rating") else str(p.get("name"))
+        for p in ranked[:limit]
+    )
+
+
+def poi_digest(candidate: RouteCandidate, names_per_query: int = 3) -> str:
+    """One-line POI summary, e.g. "cafe: 3 (avg 4.4) Blue Bottle (4.6), ..."."""
+    parts = []
+
+    for query, places in candidate.get("pois", {}).items():
+        count, avg = _poi_stats(places)
+        part = f"{query}: {count} (avg {avg})"
+        if places and names_per_query:
+            part += f" {_ranked_names(places, names_per_query)}"
+        parts.append(part)
+
+    return "; ".join(parts) or "none"
+
+
+def _render(candidates: list[RouteCandidate], names_per_query, summary_len) -> str:
+    queries = sorted({q for c in candidates for q in c.get("pois", {})})
+
+    header = ["route_id"]
+    if summary_len:
+        header.append("summary")
+    header += ["distance_m", "duration_s", "crowd_avg", "crowd_max", "safety_avg", "safety_max"]
+    for q in queries:
+        header += [f"{q}_count", f"{q}_avg_rating"]
+
+    lines = [" | ".join(header)]
+    for c in candidates:
+        row = [str(c["route_id"])]
+        if summary_len:
+            row.append(str(c.get("summary", ""))[:summary_len])
+        row += [
+            str(c["distance_m"]),
+            str(c["duration_s"]),
+            str(c["crowd_avg"]),
+            str(c["crowd_max"]),
+            str(c["safety_avg"]),
+            str(c["safety_max"]),
+        ]
+        for q in queries:
+            count, avg = _poi_stats(c.get("pois", {}).get(q, []))
+            row += [str(count), str(avg)]
+        lines.append(" | ".join(row))
+
+    if names_per_query is not None:
+        lines.append("")
+        lines.append("POIs per route:")
+        for c in candidates:
+            lines.append(f"{c['route_id']}: {poi_digest(c, names_per_query)}")
+
+    return "\n".join(lines)
+
+
+def format_candidates(candidates: list[RouteCandidate], token_budget: int | None = None) -> str:
+    """
+    Compact prompt text for candidate routes: a table of numeric features
+    plus a short POI digest. Lowest-value detail (extra POI names, then the
+    digest, then summaries) is dropped until the text fits `token_budget`.
+    """
+    token_budget = SCORING_TOKEN_BUDGET if token_budget is None else token_budget
+
+    text = ""
+    for names_per_query, summary_len in _DETAIL_LEVELS:
+        text = _render(candidates, names_per_query, summary_len)
+        if count_tokens(text) <= token_budget:
+            break
+
+    return text
@@ -0,0 +1,4 @@
+import os
+
+# the chat model client is built at import time; tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test")
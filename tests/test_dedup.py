@@ -0,0 +1,60 @@
+import numpy as np
+import polyline
+import pytest
+
+from backend.services.maps_service import deduplicate_routes
+from backend.services.route_geometry import frechet_distance, hausdorff_distance
+
+# ~111 m per 0.001 degree of latitude
+BASE = [(41.8800, -87.6300), (41.8820, -87.6300), (41.8840, -87.6300), (41.8840, -87.6270)]
+
+
+def _route(points, name="route"):
+    return {"summary": name, "overview_polyline": {"points": polyline.encode(points, 5)}}
+
+
+def _shifted(points, dlat):
+    return [(lat + dlat, lng) for lat, lng in points]
+
+
+def test_identical_routes_collapse_to_first():
+    routes = [_route(BASE, "a"), _route(BASE, "b")]
+
+    assert [r["summary"] for r in deduplicate_routes(routes, tolerance_m=40)] == ["a"]
+
+
+@pytest.mark.parametrize("metric", ["frechet", "hausdorff"])
+def test_tolerance_threshold(metric):
+    # ~20 m apart along the whole route
+    routes = [_route(BASE, "a"), _route(_shifted(BASE, 0.00018), "b")]
+
+    assert len(deduplicate_routes(routes, tolerance_m=40, metric=metric)) == 1
+    assert len(deduplicate_routes(routes, tolerance_m=10, metric=metric)) == 2
+
+
+def test_distinct_routes_and_order_kept():
+    routes = [_route(BASE, "a"), _route(_shifted(BASE, 0.003), "b"), _route(BASE, "c")]
+
+    assert [r["summary"] for r in deduplicate_routes(routes, tolerance_m=40)] == ["a", "b"]
+
+
+def test_zero_tolerance_disables_dedup():
+    routes = [_route(BASE), _route(BASE)]
+
+    assert deduplicate_routes(routes, tolerance_m=0) == routes
+
+
+def test_reversed_route_only_duplicate_under_hausdorff():
+    # same streets walked the other way: same point set, different order
+    routes = [_route(BASE, "a"), _route(BASE[::-1], "b")]
+
+    assert len(deduplicate_routes(routes, tolerance_m=40, metric="hausdorff")) == 1
+    assert len(deduplicate_routes(routes, tolerance_m=40, metric="frechet")) == 2
+
+
+def test_hausdorff_is_lower_bound_of_frechet():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        a = rng.random((16, 2)) * 500
+        b = rng.random((16, 2)) * 500
+        assert hausdorff_distance(a, b) <= frechet_distance(a, b) + 1e-9
@@ -0,0 +1,102 @@
+import pytest
+
+from backend.services.maps_service import _duration_search, _next_radius, haversine_m
+
+ORIGIN = {"lat": 41.8827, "lng": -87.6233}
+
+
+def _route(duration_s):
+    return {"legs": [{"duration": {"value": int(round(duration_s))}}]}
+
+
+def _route_s(route):
+    return route["legs"][0]["duration"]["value"]
+
+
+def _run(search, fetch):
+    """Drive a _duration_search generator; fetch(radius_m) -> routes or an exception."""
+    calls = next(search)
+    rounds = 0
+    while True:
+        rounds += 1
+        results = [fetch(haversine_m(o["lat"], o["lng"], d["lat"], d["lng"])) for o, d, _ in calls]
+        try:
+            calls = search.send(results)
+        except StopIteration as done:
+            return done.value, rounds
+
+
+def _walk(radius_m):
+    # streets wind: walking time grows faster than the straight-line radius
+    return (radius_m * 1.3 + radius_m ** 2 / 4000) / (80 / 60)
+
+
+def test_next_radius_without_history_uses_speed_guess():
+    assert _next_radius(None, 1200, 1.5) == pytest.approx(1800)
+
+
+def test_next_radius_scales_single_observation():
+    # 1000 m took 1500 s; 1200 s wanted -> scale through the origin
+    assert _next_radius([(1000, 1500)], 1200, 1.0) == pytest.approx(800)
+
+
+def test_next_radius_secant_converges():
+    target_s = 20 * 60
+    observed = []
+    radius = _next_radius(observed, target_s, 80 / 60)
+
+    for _ in range(4):
+        observed.append((radius, _walk(radius)))
+        if abs(_walk(radius) - target_s) / target_s < 0.01:
+            break
+        radius = _next_radius(observed, target_s, 80 / 60)
+
+    assert abs(_walk(radius) - target_s) / target_s < 0.01
+
+
+def test_next_radius_bisects_when_secant_leaves_bracket():
+    # last two points slope the wrong way; the secant lands beyond 2900 m
+    observed = [(1000, 500), (3000, 1300), (2900, 1400)]
+
+    assert _next_radius(observed, 900, 1.0) == pytest.approx((1000 + 2900) / 2)
+
+
+def test_duration_search_accepts_routes_within_tolerance():
+    routes, rounds = _run(
+        _duration_search(ORIGIN, 20, num_variations=8, tolerance=0.1, min_candidates=4),
+        lambda r: [_route(_walk(r))],
+    )
+
+    assert len(routes) >= 4
+    assert all(abs(_route_s(r) - 1200) <= 120 for r in routes)
+    assert rounds <= 3
+
+
+def test_duration_search_falls_back_to_nearest_misses():
+    # every route is far too long; the closest ones are still returned
+    durations = iter(range(5000, 10000, 100))
+    routes, _ = _run(
+        _duration_search(ORIGIN, 20, num_variations=8, tolerance=0.1, min_candidates=2),
+        lambda r: [_route(next(durations))],
+    )
+
+    assert [_route_s(r) for r in routes] == [5000, 5100]
+
+
+def test_duration_search_raises_when_every_call_failed():
+    error = RuntimeError("directions down")
+
+    with pytest.raises(RuntimeError, match="directions down"):
+        _run(_duration_search(ORIGIN, 20, num_variations=8), lambda r: error)
+
+
+def test_duration_search_ignores_errors_once_some_bearing_answered():
+    seen = []
+
+    def fetch(radius):
+        seen.append(radius)
+        return RuntimeError("flaky") if len(seen) % 2 else [_route(_walk(radius))]
+
+    routes, _ = _run(_duration_search(ORIGIN, 20, num_variations=8, tolerance=0.1), fetch)
+
+    assert routes
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from backend.services import agent_service, maps_service
+from benchmarks.fakes import FakeGoogle
+
+
+@pytest.fixture
+def google(monkeypatch):
+    fake = FakeGoogle(points=20)
+    monkeypatch.setattr(maps_service, "_google_get", fake.get)
+    monkeypatch.setattr(maps_service, "_agoogle_get", fake.aget)
+    maps_service.geocode_cache.clear()
+    maps_service.directions_cache.clear()
+    return fake
+
+
+def _partial_without_routes():
+    # the run geocoded both ends, then failed before any route came back
+    locations = {}
+    maps_service.get_many_routes("A", "B", num_variations=0, locations=locations)
+    maps_service.geocode_cache.clear()
+    maps_service.directions_cache.clear()
+    return {"locations": locations}
+
+
+def test_fallback_reuses_geocoded_points(google):
+    partial = _partial_without_routes()
+    google.reset_counts()
+
+    result = agent_service._fallback_from_maps("A", "B", partial=partial)
+
+    assert result["fallback"]
+    assert google.calls["geocode"] == 0
+    # direct route plus the run's three variations
+    assert google.calls["directions"] == 4
+
+
+def test_async_fallback_reuses_geocoded_points(google):
+    partial = _partial_without_routes()
+    google.reset_counts()
+
+    result = asyncio.run(agent_service._afallback_from_maps("A", "B", partial=partial))
+
+    assert result["fallback"]
+    assert google.calls["geocode"] == 0
+    assert google.calls["directions"] == 4
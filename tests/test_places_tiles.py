@@ -0,0 +1,84 @@
+import asyncio
+
+from backend.services import maps_service
+from benchmarks import fakes
+
+
+def _place(place_id, lat, lng):
+    return {"place_id": place_id, "name": place_id, "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+
+def test_cancelled_waiter_does_not_cancel_shared_tile_load(monkeypatch):
+    lat, lng = 41.8827, -87.6233
+    calls = []
+
+    async def slow_search(center_lat, center_lng, query, radius):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return [_place("p1", lat, lng)]
+
+    monkeypatch.setattr(maps_service, "_anearby_search", slow_search)
+
+    async def main():
+        row, col = maps_service._tile_of(lat, lng)
+        first = asyncio.ensure_future(maps_service._afetch_tile(row, col, "shield-test"))
+        second = asyncio.ensure_future(maps_service._afetch_tile(row, col, "shield-test"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first
+
+    places, first = asyncio.run(main())
+
+    assert first.cancelled()
+    assert [p["place_id"] for p in places] == ["p1"]
+    assert calls == ["shield-test"]
+
+
+def _tile_truth(google, row, col, query, monkeypatch):
+    """Every fake place within the tile's reach, with no page limit."""
+    monkeypatch.setattr(fakes, "PLACES_PAGE_SIZE", 10_000)
+    lat, lng = maps_service._tile_search_center(row, col)
+    found = google._places({"location": f"{lat},{lng}", "radius": maps_service._TILE_REACH_M, "keyword": query})
+    monkeypatch.setattr(fakes, "PLACES_PAGE_SIZE", 20)
+    return {p["place_id"] for p in found["results"]}
+
+
+def test_full_tile_page_is_split_instead_of_truncated(monkeypatch):
+    monkeypatch.setitem(fakes.PLACE_DENSITY, "restaurant", 1.0)
+    google = fakes.FakeGoogle()
+    monkeypatch.setattr(maps_service, "_google_get", google.get)
+    monkeypatch.setattr(maps_service, "_agoogle_get", google.aget)
+
+    row, col = maps_service._tile_of(fakes.CENTER_LAT, fakes.CENTER_LNG)
+    truth = _tile_truth(google, row, col, "restaurant", monkeypatch)
+    assert len(truth) > maps_service.PLACES_PAGE_SIZE
+
+    places = maps_service._fetch_tile(row, col, "restaurant")
+    assert {p["place_id"] for p in places} == truth
+
+    maps_service.places_cache.clear()
+    places = asyncio.run(maps_service._afetch_tile(row, col, "restaurant"))
+    assert {p["place_id"] for p in places} == truth
+
+
+def test_tile_still_full_after_splits_is_not_cached(monkeypatch):
+    monkeypatch.setitem(fakes.PLACE_DENSITY, "restaurant-nosplit", 1.0)
+    monkeypatch.setattr(maps_service, "PLACES_SPLIT_DEPTH", 0)
+    google = fakes.FakeGoogle()
+    monkeypatch.setattr(maps_service, "_google_get", google.get)
+
+    row, col = maps_service._tile_of(fakes.CENTER_LAT, fakes.CENTER_LNG)
+    maps_service._fetch_tile(row, col, "restaurant-nosplit")
+
+    assert maps_service.places_cache.get(maps_service._tile_key(row, col, "restaurant-nosplit")) is None
+
+
+def test_planner_never_costs_more_calls_for_a_dense_keyword(monkeypatch):
+    from benchmarks.run import check_planner
+
+    google = fakes.FakeGoogle()
+    monkeypatch.setattr(maps_service, "_google_get", google.get)
+
+    unplanned, planned = check_planner(google)
+
+    assert planned <= unplanned
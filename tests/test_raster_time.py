@@ -0,0 +1,35 @@
+import pytest
+
+from backend.services.raster_service import _parse_time, hour_of_week, read_events
+
+
+@pytest.mark.parametrize("value, expected", [
+    # Monday 02:00 UTC is Sunday 21:00 in Chicago (CDT, UTC-5)
+    ("2024-06-03T02:00:00+00:00", 6 * 24 + 21),
+    ("2024-06-03T02:00:00Z", 6 * 24 + 21),
+    # naive values are already Chicago wall time
+    ("2024-06-03T02:00:00", 2),
+])
+def test_parse_time_buckets_in_raster_tz(value, expected):
+    moment = _parse_time(value, tz="America/Chicago")
+
+    assert str(moment.tzinfo) == "America/Chicago"
+    assert hour_of_week(moment) == expected
+
+
+def test_parse_time_with_format_and_offset():
+    moment = _parse_time("2024-01-01 12:00 +0100", "%Y-%m-%d %H:%M %z", tz="America/Chicago")
+
+    # 11:00 UTC is 05:00 CST (UTC-6)
+    assert hour_of_week(moment) == 5
+
+
+def test_read_events_uses_tz(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("lat,lng,time\n41.88,-87.62,2024-06-03T02:00:00Z\n41.88,-87.62,not a time\n")
+
+    _, _, chicago, _ = read_events(path, time_col="time", tz="America/Chicago")
+    _, _, utc, _ = read_events(path, time_col="time", tz="UTC")
+
+    assert chicago.tolist() == [6 * 24 + 21]
+    assert utc.tolist() == [2]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services import maps_service
+from backend.services.rate_limit_service import CircuitBreaker, CircuitOpenError, SharedTokenBucket
+
+
+def _open(breaker):
+    for _ in range(breaker.failures):
+        breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker("test", failures=2, cooldown_s=0.05)
+    breaker.allow()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only one probe at a time
+
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.allow()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("test", failures=2, cooldown_s=0.05)
+    _open(breaker)
+
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_cancelled_probe_is_released(monkeypatch):
+    breaker = CircuitBreaker("places", failures=1, cooldown_s=0.01)
+    _open(breaker)
+    time.sleep(0.02)
+    monkeypatch.setitem(maps_service._breakers, "places", breaker)
+
+    async def hanging_get(url, params):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(maps_service, "_ahttp_get", hanging_get)
+
+    async def main():
+        probe = asyncio.ensure_future(maps_service._agoogle_get(maps_service.PLACES_URL, {}))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(main())
+
+    breaker.allow()  # a new probe may go out
+
+
+def test_shared_bucket_async_acquire_runs_off_the_loop(tmp_path, monkeypatch):
+    bucket = SharedTokenBucket(str(tmp_path / "limits.db"), "places", rate=100)
+    threads = []
+    try_acquire = bucket.try_acquire
+
+    def recording_try_acquire():
+        threads.append(threading.current_thread())
+        return try_acquire()
+
+    monkeypatch.setattr(bucket, "try_acquire", recording_try_acquire)
+
+    asyncio.run(bucket.aacquire())
+
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,28 @@
+import pytest
+
+from loopwalk_ai.scoring import PREFERENCE_KEYWORDS, _poi_stats
+
+
+def _candidate(query, ratings=(4.0,)):
+    return {"pois": {query: [{"name": f"{query} {i}", "rating": r} for i, r in enumerate(ratings)]}}
+
+
+@pytest.mark.parametrize("query, pref", [
+    ("park", "parks"),
+    ("Parks", "parks"),
+    ("community garden", "parks"),
+    ("coffee shop", "cafes"),
+    ("cafés", "cafes"),
+    ("bakeries", "cafes"),
+])
+def test_keyword_words_match(query, pref):
+    assert _poi_stats(_candidate(query), PREFERENCE_KEYWORDS[pref]) == (1, 4.0)
+
+
+@pytest.mark.parametrize("query, pref", [
+    ("parking", "parks"),
+    ("evergreen terrace", "parks"),
+    ("steakhouse", "cafes"),
+])
+def test_substrings_do_not_match(query, pref):
+    assert _poi_stats(_candidate(query), PREFERENCE_KEYWORDS[pref]) == (0, 0.0)
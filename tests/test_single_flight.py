@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+
+from backend.services import agent_service
+from backend.services.metrics_service import RESULT_CACHE_REQUESTS
+
+# lets the leader's computation finish once the follower is waiting on it
+release = threading.Event()
+
+
+def _key():
+    return f"test|{uuid.uuid4()}"
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _run_two_threads(key, compute):
+    """Start a leader, then a follower once the leader is computing; returns both outcomes."""
+    outcomes = [None, None]
+
+    def call(i):
+        try:
+            outcomes[i] = agent_service._cached_call(key, compute)
+        except Exception as e:
+            outcomes[i] = e
+
+    coalesced = RESULT_CACHE_REQUESTS.value(outcome="coalesced")
+    leader = threading.Thread(target=call, args=(0,))
+    follower = threading.Thread(target=call, args=(1,))
+    leader.start()
+    _wait_for(lambda: key in agent_service._inflight)
+    follower.start()
+    _wait_for(lambda: RESULT_CACHE_REQUESTS.value(outcome="coalesced") > coalesced)
+    release.set()
+    leader.join()
+    follower.join()
+    return outcomes
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    release.clear()
+    yield
+    agent_service.result_cache.clear()
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return {"route_id": 1, "route": {"legs": []}}
+
+    first, second = _run_two_threads(_key(), compute)
+
+    assert len(calls) == 1
+    assert first == second == {"route_id": 1, "route": {"legs": []}}
+    # each caller owns its copy
+    assert first is not second
+
+
+def test_exception_reaches_every_coalesced_caller():
+    def compute():
+        release.wait(2)
+        raise RuntimeError("pipeline down")
+
+    key = _key()
+    outcomes = _run_two_threads(key, compute)
+
+    assert all(isinstance(o, RuntimeError) and str(o) == "pipeline down" for o in outcomes)
+    assert key not in agent_service._inflight
+    assert agent_service.result_cache.get(key) is None
+
+
+def test_async_concurrent_identical_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"route_id": 2}
+
+    async def main():
+        key = _key()
+        return await asyncio.gather(*(agent_service._acached_call(key, compute) for _ in range(3)))
+
+    coalesced = RESULT_CACHE_REQUESTS.value(outcome="coalesced")
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert results == [{"route_id": 2}] * 3
+    assert RESULT_CACHE_REQUESTS.value(outcome="coalesced") == coalesced + 2
+
+
+def test_async_exception_reaches_every_coalesced_caller():
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("pipeline down")
+
+    async def main():
+        key = _key()
+        results = await asyncio.gather(
+            *(agent_service._acached_call(key, compute) for _ in range(3)),
+            return_exceptions=True,
+        )
+        return key, results
+
+    key, results = asyncio.run(main())
+
+    assert all(isinstance(r, RuntimeError) and str(r) == "pipeline down" for r in results)
+    assert agent_service.result_cache.get(key) is None
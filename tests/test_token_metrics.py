@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from backend.services.metrics_service import LLM_COMPLETION_TOKENS, LLM_PROMPT_TOKENS, render_metrics
+from benchmarks.fakes import StubChatModel
+from loopwalk_ai import batch, config
+from loopwalk_ai.graph import nodes
+from loopwalk_ai.intent_cache import intent_cache
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    stub = StubChatModel()
+    monkeypatch.setattr(config, "llm", stub)
+    monkeypatch.setattr(nodes, "llm", stub)
+    config.get_structured_llm.cache_clear()
+    intent_cache.clear()
+    yield stub
+    config.get_structured_llm.cache_clear()
+
+
+def test_node_usage_is_exported_by_node(chat):
+    before = LLM_PROMPT_TOKENS.value(node="intent"), LLM_COMPLETION_TOKENS.value(node="intent")
+    state = {"query": "a quiet walk with token metrics"}
+
+    nodes.intent_node(state)
+
+    assert LLM_PROMPT_TOKENS.value(node="intent") > before[0]
+    assert LLM_COMPLETION_TOKENS.value(node="intent") == before[1] + 40
+    assert state["token_usage"]["intent"]["completion_tokens"] == 40
+    assert 'loopwalk_llm_prompt_tokens_total{node="intent"}' in render_metrics()
+
+
+def test_batch_usage_is_exported(chat):
+    before = LLM_COMPLETION_TOKENS.value(node="batch.intent")
+
+    asyncio.run(batch.aprefill_intents(["batch query one", "batch query two"]))
+
+    assert LLM_COMPLETION_TOKENS.value(node="batch.intent") == before + 40
+    assert LLM_PROMPT_TOKENS.value(node="batch.intent") > 0
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.walk_graph import _M_PER_DEG_LAT, WalkGraph
+
+
+def _graph(lat, lng):
+    n = len(lat)
+    return WalkGraph(
+        lat=np.asarray(lat, dtype=np.float64),
+        lng=np.asarray(lng, dtype=np.float64),
+        indptr=np.zeros(n + 1, dtype=np.int64),
+        indices=np.zeros(0, dtype=np.int64),
+        length=np.zeros(0, dtype=np.float32),
+        name_id=np.zeros(0, dtype=np.int32),
+        names=[],
+    )
+
+
+def _brute_force(graph, lat, lng, max_distance_m):
+    dy = (graph.lat - lat) * _M_PER_DEG_LAT
+    dx = (graph.lng - lng) * _M_PER_DEG_LAT * math.cos(math.radians(lat))
+    d = np.sqrt(dx * dx + dy * dy)
+    node = int(np.argmin(d))
+    return d[node] if d[node] <= max_distance_m else None
+
+
+def _distance(graph, node, lat, lng):
+    dy = (graph.lat[node] - lat) * _M_PER_DEG_LAT
+    dx = (graph.lng[node] - lng) * _M_PER_DEG_LAT * math.cos(math.radians(lat))
+    return math.hypot(dx, dy)
+
+
+@pytest.mark.parametrize("max_distance_m", [50, 200, 700])
+def test_nearest_node_matches_full_scan(max_distance_m):
+    rng = np.random.default_rng(1)
+    # ~5 x 5 km, sparse enough that some snaps find nothing within 50 m
+    graph = _graph(41.85 + rng.random(3000) * 0.045, -87.65 + rng.random(3000) * 0.06)
+
+    # queries inside, at the edge of and well outside the extract
+    queries = zip(41.84 + rng.random(300) * 0.065, -87.66 + rng.random(300) * 0.08)
+    for lat, lng in queries:
+        expected = _brute_force(graph, lat, lng, max_distance_m)
+        node = graph.nearest_node(lat, lng, max_distance_m)
+        if expected is None:
+            assert node is None
+        else:
+            assert _distance(graph, node, lat, lng) == pytest.approx(expected)
+
+
+def test_nearest_node_far_away_or_empty():
+    graph = _graph([41.88, 41.881], [-87.63, -87.631])
+
+    assert graph.nearest_node(41.8801, -87.6301) == 0
+    assert graph.nearest_node(42.5, -87.63) is None
+    assert _graph([], []).nearest_node(41.88, -87.63) is None